@@ -0,0 +1,72 @@
+'''
+Benchmarks the memory used per finding by the Finding class against the
+misspelling dicts it replaced in SpellChecker._check_text.
+
+Usage: python benchmarks/finding_memory_benchmark.py [number of findings]
+'''
+import os
+import random
+import sys
+import tracemalloc
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finding import Finding  # noqa: E402
+
+SEARCH_URL = 'http://www.google.com/search?q='
+WORDS = ['dividend', 'revenue', 'grew', 'the', 'company', 'reported', 'earnings', 'per', 'share',
+         'of', 'margin', 'outlook', 'guidance', 'adjusted', 'income', 'cash-flow', 'quarter']
+MISSPELLINGS = ['devidend', 'anual', 'reveneu', 'earnigns', 'guidence', 'quartre', 'outlok']
+SUGGESTIONS = (['dividend', 'divided', 'dividends'], ['annual', 'anal', 'manual'], ['revenue'])
+
+
+def legacy_finding(w, row, context, suggestions, i, start, context_start):
+    ''' Misspelling dict built by _check_text before the Finding class '''
+    return {'word': w,
+            'row': row,
+            'context': context,
+            'suggestions': suggestions,
+            'search_context_url': SEARCH_URL + urllib.parse.quote_plus(context),
+            'search_word_url': SEARCH_URL + urllib.parse.quote_plus(w),
+            'index': i,
+            'start': start,
+            'end': start + len(w),
+            'context_start': context_start}
+
+
+def new_finding(w, row, context, suggestions, i, start, context_start):
+    return Finding(w, row, context, suggestions, index=i, start=start, end=start + len(w),
+                   context_start=context_start)
+
+
+def generate(n):
+    ''' Yields the arguments of n findings, each in a context of 11 words '''
+    random.seed(0)
+    # Suggestions are shared through the token cache, so each misspelling has one tuple
+    suggestions = {w: tuple(random.choice(SUGGESTIONS)) for w in MISSPELLINGS}
+    for row in range(n):
+        w = random.choice(MISSPELLINGS)
+        context = ' '.join([random.choice(WORDS) for _ in range(5)] + [w] + [random.choice(WORDS) for _ in range(5)])
+        # Words are sliced out of the text, so each finding has its own word string
+        context_start = context.index(w)
+        w = context[context_start:context_start + len(w)]
+        yield w, row, context, suggestions[w], 5, 40, context_start
+
+
+def measure(func, n):
+    ''' Returns the bytes allocated per finding, excluding the context strings shared by both '''
+    args = list(generate(n))
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    findings = [func(*a) for a in args]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del findings
+    return size / n
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for name, func in [('dict', legacy_finding), ('Finding', new_finding)]:
+        print(f'{name:>10}: {measure(func, n):,.0f} bytes/finding ({n:,} findings)')
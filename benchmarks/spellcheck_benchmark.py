@@ -0,0 +1,260 @@
+'''
+Benchmarks spell_check_text in each checking mode, and apply_user_actions, on synthetic
+finance text and dictionary files. Each mode runs in its own process so peak memory is
+measured separately. Google searches are stubbed out so runs are reproducible and offline.
+
+Reports rows/sec, tokens/sec, peak RSS and the time taken by each stage of the run,
+and saves the results as JSON so runs can be compared over time.
+
+Usage: python benchmarks/spellcheck_benchmark.py [--rows=N] [--typo-rate=F] [--duplicate-rate=F]
+       [--dictionary-size=N] [--modes=no-suggestions,no-auto,full] [--workers=N]
+       [--suggestions=enchant|symspell] [--seed=N] [--output=benchmark.json]
+'''
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import Future
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where peak RSS is not reported
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# spell_check_text keyword arguments for each mode, matching the spell_check_text.py flags
+MODES = {'no-suggestions': {'suggest': False},
+         'no-auto': {'auto': False},
+         'full': {}}
+APPLY_MODE = 'apply'
+
+WORDS = ['the', 'company', 'reported', 'earnings', 'per', 'share', 'of', 'revenue', 'grew', 'in', 'quarter',
+         'dividend', 'margin', 'guidance', 'outlook', 'income', 'net', 'cash', 'flow', 'operating', 'expenses',
+         'increased', 'decreased', 'compared', 'to', 'last', 'year', 'analysts', 'expect', 'growth', 'and',
+         'shares', 'rose', 'fell', 'after', 'results', 'were', 'above', 'below', 'estimates', 'interest',
+         'rates', 'debt', 'balance', 'sheet', 'capital', 'investors', 'market', 'price', 'target']
+PUNCTUATION = ['', '', '', '', ',', '.', ';']
+NUMBERS = ['12%', '$1.24', 'Q3', '2021', '4.5bn', '(3%)']
+NAMES = ['Apple', 'Tesla', 'Goldman', 'Microsoft', 'Barclays', 'TSLA', 'AAPL', 'EBITDA']
+LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def make_custom_words(size, rng):
+    ''' Returns a list of made up finance terms for the custom dictionary '''
+    words = set()
+    while len(words) < size:
+        words.add(rng.choice(['fin', 'cap', 'lev', 'arb', 'yield', 'hedge', 'coupon', 'bond', 'swap'])
+                  + ''.join(rng.choice(LETTERS) for _ in range(rng.randint(2, 5))))
+    return sorted(words)
+
+
+def make_typo(word, rng):
+    ''' Returns the word with a random deletion, insertion, substitution or transposition '''
+    i = rng.randrange(len(word))
+    edit = rng.choice(['delete', 'insert', 'substitute', 'transpose'])
+    if edit == 'delete' and len(word) > 3:
+        return word[:i] + word[i+1:]
+    if edit == 'transpose' and i < len(word) - 1:
+        return word[:i] + word[i+1] + word[i] + word[i+2:]
+    if edit == 'insert':
+        return word[:i] + rng.choice(LETTERS) + word[i:]
+    return word[:i] + rng.choice(LETTERS.replace(word[i], '')) + word[i+1:]
+
+
+def make_sentence(custom_words, typo_rate, rng):
+    tokens = []
+    for _ in range(rng.randint(8, 30)):
+        r = rng.random()
+        if r < 0.05:
+            tokens.append(rng.choice(NUMBERS))
+            continue
+        if r < 0.1:
+            tokens.append(rng.choice(NAMES))
+            continue
+        word = rng.choice(custom_words) if r < 0.2 else rng.choice(WORDS)
+        if len(word) > 3 and rng.random() < typo_rate:
+            word = make_typo(word, rng)
+        tokens.append(word + rng.choice(PUNCTUATION))
+    return ' '.join(tokens)
+
+
+def generate(directory, rows=1000, typo_rate=0.02, duplicate_rate=0.2, dictionary_size=500, seed=0):
+    '''
+    Writes text.xlsx and dictionary.xlsx files to the directory, where typo_rate of the words
+    have a typo and duplicate_rate of the rows repeat an earlier row.
+    Returns the number of tokens in the text.
+    '''
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    custom_words = make_custom_words(dictionary_size, rng)
+
+    dict_wb = Workbook(write_only=True)
+    dict_ws = dict_wb.create_sheet()
+    # Some cells list several words seperated by pipes
+    i = 0
+    while i < len(custom_words):
+        n = rng.choice([1, 1, 1, 3])
+        dict_ws.append([' | '.join(custom_words[i:i+n])])
+        i += n
+    dict_wb.save(os.path.join(directory, 'dictionary.xlsx'))
+
+    text_wb = Workbook(write_only=True)
+    text_ws = text_wb.create_sheet()
+    text_ws.append(['Text'])
+    sentences = []
+    num_tokens = 0
+    for _ in range(rows):
+        if sentences and rng.random() < duplicate_rate:
+            sentence = rng.choice(sentences)
+        else:
+            sentence = make_sentence(custom_words, typo_rate, rng)
+            sentences.append(sentence)
+        num_tokens += len(sentence.split())
+        text_ws.append([sentence])
+    text_wb.save(os.path.join(directory, 'text.xlsx'))
+    return num_tokens
+
+
+class StubCorrectionFetcher:
+    ''' Stands in for CorrectionFetcher, finding no google correction for any word '''
+
+    def submit(self, url, word=None):
+        future = Future()
+        future.set_result([])
+        return future
+
+    def close(self):
+        pass
+
+
+def peak_rss_mb():
+    ''' Returns the peak resident set size of this process in MB, or None if unknown '''
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / (1 << 10)
+
+
+def run_mode(mode, directory, spell_check_kwargs):
+    ''' Runs a mode in this process and returns its results '''
+    from spellchecker import SpellChecker
+
+    os.chdir(directory)
+    sc = SpellChecker(_spacy=mode == 'full')
+    # Worker processes copy the disabled correction store setting and leave google searches
+    # to this SpellChecker's stub fetcher, so runs with --workers are offline and repeatable too
+    sc.correction_store_file = None
+    sc._correction_fetcher = StubCorrectionFetcher()
+
+    start_time = time.perf_counter()
+    if mode == APPLY_MODE:
+        sc.apply_user_actions()
+        profile = None
+    else:
+        profile = sc.spell_check_text(profile=True, **dict(spell_check_kwargs, **MODES[mode]))
+    secs = time.perf_counter() - start_time
+    if os.path.exists(os.path.join(directory, 'corrections.sqlite3')):
+        raise RuntimeError('The correction store was written, so results would depend on previous runs')
+
+    return {'seconds': secs,
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': profile['stages'] if profile else None,
+            'counts': profile['counts'] if profile else dict(sc.count)}
+
+
+def run_mode_process(mode, directory, spell_check_kwargs):
+    ''' Runs a mode in a new process and returns its results, or None if it failed '''
+    result_file = os.path.join(directory, f'{mode}.json')
+    args = [sys.executable, os.path.abspath(__file__), '--run-mode', mode, directory,
+            json.dumps(spell_check_kwargs), result_file]
+    with open(os.path.join(directory, f'{mode}.log'), 'w') as log:
+        returncode = subprocess.call(args, stdout=log, stderr=subprocess.STDOUT)
+    if returncode != 0:
+        print(f'WARN: {mode} mode failed, see {os.path.join(directory, f"{mode}.log")}')
+        return None
+    with open(result_file) as f:
+        return json.load(f)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv):
+    options = {'rows': 1000, 'typo_rate': 0.02, 'duplicate_rate': 0.2, 'dictionary_size': 500,
+               'seed': 0, 'modes': list(MODES), 'workers': 1, 'suggestions': None,
+               'output': 'benchmark.json'}
+    for arg in argv:
+        key, _, value = arg.lstrip('-').partition('=')
+        key = key.replace('-', '_')
+        if key not in options:
+            sys.exit(f'Unknown option: {arg}')
+        if key == 'modes':
+            value = value.split(',')
+        elif key in ('typo_rate', 'duplicate_rate'):
+            value = float(value)
+        elif key in ('rows', 'dictionary_size', 'seed', 'workers'):
+            value = int(value)
+        options[key] = value
+    return options
+
+
+def main(argv):
+    options = parse_args(argv)
+    spell_check_kwargs = {'workers': options['workers']}
+    if options['suggestions']:
+        spell_check_kwargs['suggestion_engine'] = options['suggestions']
+
+    directory = tempfile.mkdtemp(prefix='spellcheck-benchmark-')
+    print(f'Generating {options["rows"]:,} rows in {directory}...')
+    num_tokens = generate(directory, options['rows'], options['typo_rate'], options['duplicate_rate'],
+                          options['dictionary_size'], options['seed'])
+
+    results = {}
+    for mode in options['modes'] + [APPLY_MODE]:
+        print(f'Running {mode}...')
+        result = run_mode_process(mode, directory, spell_check_kwargs)
+        if result is None:
+            continue
+        result['rows_per_sec'] = options['rows'] / result['seconds']
+        result['tokens_per_sec'] = num_tokens / result['seconds']
+        results[mode] = result
+
+    report = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'commit': git_commit(),
+              'python': platform.python_version(),
+              'platform': platform.platform(),
+              'options': options,
+              'tokens': num_tokens,
+              'modes': results}
+    with open(options['output'], 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f'\n{"Mode":<16}{"Seconds":>10}{"Rows/sec":>12}{"Tokens/sec":>14}{"Peak RSS MB":>14}')
+    for mode, result in results.items():
+        print(f'{mode:<16}{result["seconds"]:>10.2f}{result["rows_per_sec"]:>12,.0f}'
+              f'{result["tokens_per_sec"]:>14,.0f}{result["peak_rss_mb"] or 0:>14,.0f}')
+    print(f'\nResults saved to "{options["output"]}"')
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--run-mode':
+        mode, directory, spell_check_kwargs, result_file = sys.argv[2:6]
+        result = run_mode(mode, directory, json.loads(spell_check_kwargs))
+        with open(result_file, 'w') as f:
+            json.dump(result, f)
+    else:
+        main(sys.argv[1:])
@@ -0,0 +1,45 @@
+'''
+Benchmarks SpellChecker startup time in a fresh Python process, as paid by
+apply_user_actions.py and --no-suggestions/--no-auto runs, and optionally the
+time to load the Spacy pipeline on first use.
+
+Usage: python benchmarks/startup_benchmark.py [--nlp] [repeats]
+'''
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = '''
+import time
+start_time = time.perf_counter()
+import spellchecker
+import_secs = time.perf_counter() - start_time
+sc = spellchecker.SpellChecker()
+init_secs = time.perf_counter() - start_time - import_secs
+nlp_secs = 0
+if {load_nlp}:
+    sc.nlp
+    nlp_secs = time.perf_counter() - start_time - import_secs - init_secs
+print(import_secs, init_secs, nlp_secs)
+'''
+
+
+def measure(load_nlp=False):
+    ''' Returns (import secs, __init__ secs, nlp load secs) measured in a new process '''
+    out = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT.format(load_nlp=load_nlp)],
+                         cwd=ROOT_DIR, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+    return tuple(float(x) for x in out.split()[-3:])
+
+
+if __name__ == "__main__":
+    load_nlp = '--nlp' in sys.argv
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    repeats = int(args[0]) if args else 5
+
+    results = [measure(load_nlp) for _ in range(repeats)]
+    for name, values in zip(['import spellchecker', 'SpellChecker()', 'first nlp use'], zip(*results)):
+        if name == 'first nlp use' and not load_nlp:
+            continue
+        print(f'{name:>20}: min {min(values):.3f}s, mean {sum(values) / len(values):.3f}s')
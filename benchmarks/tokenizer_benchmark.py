@@ -0,0 +1,75 @@
+'''
+Benchmarks the tokenizer against the split/strip/regex logic it replaced
+in SpellChecker.spell_check_text, reporting tokens per second.
+
+Usage: python benchmarks/tokenizer_benchmark.py [number of sentences]
+'''
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tokenizer import tokenize  # noqa: E402
+
+WORDS = ['dividend', 'EBITDA', 'TSLA', 'revenue', 'grew', '12%', '(net', 'income),', 'Q3', 'the',
+         'company', 'reported', 'earnings', 'per', 'share', 'of', '$1.24', 'Apple', 'guidance.',
+         'dividends;', '[adjusted]', 'margin', 'devidend', 'anual', 'cash-flow', 'outlook!']
+
+
+def legacy_tokenize(text):
+    ''' Token loop from spell_check_text before the tokenizer module, returning words to check '''
+    checked = []
+    for i, w in enumerate(text.split()):
+        try:
+            # Remove punctuation
+            if w[-1] in [',', '.', ';', ':', '/', '-', '!', '?', '%']:
+                w = w[:-1]
+            # Remove brackets
+            if w[0] in ['(', '[', '{']:
+                w = w[1:]
+            if w[-1] in [')', ']', '}']:
+                w = w[:-1]
+        except IndexError:
+            continue
+        # Ignore words with numbers
+        if re.search('[0-9]+', w):
+            continue
+        # Ignore short, all caps words (Likely tickers)
+        if len(w) <= 5 and (w == w.upper()):
+            continue
+        # Ignore capiltalized words (Names)
+        if w == w.capitalize():
+            continue
+        if not w:
+            continue
+        checked.append((i, w))
+    return checked
+
+
+def new_tokenize(text):
+    return [(i, word) for i, raw, word, skip in tokenize(text) if not skip]
+
+
+def run(func, sentences):
+    start_time = time.perf_counter()
+    for text in sentences:
+        func(text)
+    return time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(0)
+    sentences = [' '.join(random.choice(WORDS) for _ in range(random.randint(5, 30))) for _ in range(n)]
+    num_tokens = sum(len(s.split()) for s in sentences)
+
+    # Both tokenizers must agree before timing them
+    for text in sentences[:1000]:
+        assert legacy_tokenize(text) == new_tokenize(text), text
+
+    for name, func in [('legacy', legacy_tokenize), ('tokenizer', new_tokenize)]:
+        secs = run(func, sentences)
+        print(f'{name:>10}: {num_tokens / secs:,.0f} tokens/sec ({secs:.2f}s for {num_tokens:,} tokens)')
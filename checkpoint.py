@@ -0,0 +1,104 @@
+import json
+import os
+import sqlite3
+import time
+
+from finding import Finding
+
+
+class Checkpoint:
+    '''
+    Periodic checkpoint of a spell check run, recording the last row whose findings have all
+    been stored, the findings of the rows up to it, the run's counters and its caches.
+    A run resumed from a checkpoint stores the findings of those rows instead of checking
+    them again, so the spacy pipeline and google searches are not repeated.
+
+    Findings are added as they are stored but only committed with each checkpoint, so the
+    file always holds a consistent checkpoint, even if the run is killed between checkpoints.
+    '''
+
+    def __init__(self, path, options, resume=False, interval=300):
+        self.path = path
+        self.options = options
+        # Seconds between checkpoints
+        self.interval = interval
+        self.last_save_time = time.time()
+        # Last row of the checkpoint being resumed, and the counters saved with it
+        self.resume_row = None
+        self.counts = {}
+
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS findings (row INTEGER NOT NULL,
+                                                                  corrected INTEGER NOT NULL,
+                                                                  data TEXT NOT NULL)''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS findings_row ON findings (row)')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS caches (name TEXT NOT NULL,
+                                                                key TEXT NOT NULL,
+                                                                value TEXT NOT NULL)''')
+
+        if resume:
+            if self._get_meta('options') == options:
+                self.resume_row = self._get_meta('row')
+                self.counts = self._get_meta('counts') or {}
+            else:
+                # Findings depend on the input, dictionary and spell check options
+                self.conn.execute('DELETE FROM meta')
+                self.conn.execute('DELETE FROM findings')
+                self.conn.execute('DELETE FROM caches')
+        self._set_meta('options', options)
+        self.conn.commit()
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def get_findings(self, row):
+        ''' Returns a list of (corrected, finding) tuples saved for a row up to the checkpoint '''
+        rows = self.conn.execute('SELECT corrected, data FROM findings WHERE row = ? ORDER BY rowid', (row,))
+        return [(bool(corrected), Finding.from_dict(json.loads(data))) for corrected, data in rows]
+
+    def get_cache(self, name):
+        ''' Yields the (key, value) entries of a saved cache, least recently used first '''
+        rows = self.conn.execute('SELECT key, value FROM caches WHERE name = ? ORDER BY rowid', (name,))
+        for key, value in rows.fetchall():
+            yield key, json.loads(value)
+
+    def add_finding(self, corrected, finding):
+        ''' Records a finding, unless its row is already in the checkpoint being resumed '''
+        if self.resume_row is not None and finding.row <= self.resume_row:
+            return
+        self.conn.execute('INSERT INTO findings VALUES (?, ?, ?)',
+                          (finding.row, int(corrected), json.dumps(finding.to_dict())))
+
+    def due(self):
+        ''' Returns True once interval seconds have passed since the last checkpoint '''
+        return time.time() - self.last_save_time >= self.interval
+
+    def save(self, row, counts, caches):
+        '''
+        Saves a checkpoint up to and including the row, where caches is a dict of
+        cache names to iterables of (key, value) entries, least recently used first
+        '''
+        self._set_meta('row', row)
+        self._set_meta('counts', counts)
+        self.conn.execute('DELETE FROM caches')
+        for name, entries in caches.items():
+            self.conn.executemany('INSERT INTO caches VALUES (?, ?, ?)',
+                                  ((name, key, json.dumps(value)) for key, value in entries))
+        self.conn.commit()
+        self.last_save_time = time.time()
+
+    def close(self):
+        ''' Closes the checkpoint of an unfinished run, keeping the last checkpoint to resume '''
+        self.conn.close()
+
+    def remove(self):
+        ''' Deletes the checkpoint once the run has finished '''
+        self.conn.close()
+        os.remove(self.path)
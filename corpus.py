@@ -0,0 +1,74 @@
+import math
+from collections import Counter
+
+from suggester import edit_distance
+from tokenizer import SKIP_NUMBER, SKIP_PUNCTUATION, tokenize
+
+
+class CorpusStats:
+    '''
+    Word frequencies of the text being spell checked, built in a single streaming pass
+    over its rows. Spellings which dominate the text are used to rank suggestions and to
+    correct misspellings with an obvious correction without running the spacy pipeline.
+    '''
+
+    def __init__(self, counts=None, distance_weight=math.log(20), min_count=5, min_ratio=10, max_distance=2):
+        # Map each lowercase word to the number of times it appears in the text
+        self.counts = Counter(counts or {})
+        # Each edit in a suggestion must be made up for by a distance_weight higher log frequency
+        self.distance_weight = distance_weight
+        # A suggestion is only used as a correction if it appears at least min_count times, and
+        # min_ratio times more often than both the misspelling and any other suggestion
+        self.min_count = min_count
+        self.min_ratio = min_ratio
+        self.max_distance = max_distance
+
+    @classmethod
+    def from_rows(cls, rows, **kwargs):
+        ''' Returns the word frequencies of an iterable of (row number, text) tuples '''
+        stats = cls(**kwargs)
+        counts = stats.counts
+        for row, value in rows:
+            if not value:
+                continue
+            for i, raw, w, skip in tokenize(str(value)):
+                if skip != SKIP_PUNCTUATION and skip != SKIP_NUMBER:
+                    counts[w.lower()] += 1
+        return stats
+
+    def __len__(self):
+        return len(self.counts)
+
+    def frequency(self, word):
+        return self.counts.get(word.lower(), 0)
+
+    def score(self, word, suggestion):
+        ''' Returns the score of a suggestion for the lowercase word, higher is better '''
+        distance = edit_distance(word, suggestion.lower())
+        return math.log(self.frequency(suggestion) + 1) - distance * self.distance_weight
+
+    def rank(self, word, suggestions):
+        '''
+        Returns the suggestions for the lowercase word, best first. Suggestions with the same
+        score keep their order, so suggestions not in the text are ranked as given.
+        '''
+        return sorted(suggestions, key=lambda suggestion: -self.score(word, suggestion))
+
+    def get_correction(self, word, suggestions):
+        '''
+        Returns the suggestion which is the obvious correction for the lowercase word
+        in this text, else None
+        '''
+        if not suggestions:
+            return None
+        best, *others = self.rank(word, suggestions)
+        count = self.frequency(best)
+        if count < self.min_count:
+            return None
+        if edit_distance(word, best.lower(), self.max_distance) is None:
+            return None
+        if count < self.min_ratio * self.frequency(word):
+            return None
+        if any(count < self.min_ratio * self.frequency(other) for other in others):
+            return None
+        return best
@@ -0,0 +1,139 @@
+import asyncio
+import functools
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from bs4 import BeautifulSoup
+from tqdm import tqdm
+
+
+class TokenBucket:
+    ''' Asyncio token bucket rate limiter allowing rate requests per second, with bursts of up to capacity '''
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class CorrectionFetcher:
+    '''
+    Fetches google "Did you mean: ..." corrections in the background.
+    Requests run concurrently on an asyncio event loop in a daemon thread, limited by a
+    token bucket, and are retried with exponential backoff on non-2xx responses.
+    Identical queries are only requested once while in flight; finished queries are left to
+    the correction store, so queries that failed can be retried.
+    '''
+
+    def __init__(self, session=None, headers=None, rate=1/3, burst=1, concurrency=4,
+                 max_retries=3, backoff=5.0, timeout=30, count=None):
+        self.session = session or requests.Session()
+        self.headers = headers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        # Counters are shared with the SpellChecker if given
+        self.count = count if count is not None else {}
+
+        self.futures = {}  # Query url to concurrent.futures.Future of its suggested words, while in flight
+        self.futures_lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(concurrency)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        # Asyncio primitives must be created in the event loop thread
+        self.bucket, self.semaphore = asyncio.run_coroutine_threadsafe(
+            self._create_limiters(rate, burst, concurrency), self.loop).result()
+
+    async def _create_limiters(self, rate, burst, concurrency):
+        return TokenBucket(rate, burst), asyncio.Semaphore(concurrency)
+
+    def submit(self, url, word=None):
+        '''
+        Queues a google search url and returns a concurrent.futures.Future of the
+        list of suggested words, or None if no correction was found
+        '''
+        with self.futures_lock:
+            future = self.futures.get(url)
+            if future is not None:
+                self._increment('google-duplicate-queries')
+                return future
+            future = asyncio.run_coroutine_threadsafe(self._fetch(url, word), self.loop)
+            self.futures[url] = future
+        # Added outside the lock, as the callback runs immediately if the future is already done
+        future.add_done_callback(functools.partial(self._forget, url))
+        return future
+
+    def _forget(self, url, future):
+        ''' Drops a finished query, so the futures dict does not grow with the whole run '''
+        with self.futures_lock:
+            if self.futures.get(url) is future:
+                del self.futures[url]
+
+    def close(self):
+        ''' Stops the event loop thread, cancelling any queued requests '''
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.executor.shutdown(wait=False)
+
+    async def _fetch(self, url, word=None):
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.bucket.acquire()
+                tqdm.write(f'Googling word "{word}"...')
+                self._increment('google-requests')
+                try:
+                    r = await self.loop.run_in_executor(self.executor, functools.partial(
+                        self.session.get, url, headers=self.headers, timeout=self.timeout))
+                except requests.RequestException as e:
+                    tqdm.write(f'WARN: Request for word "{word}" failed: {e}')
+                else:
+                    if 200 <= r.status_code < 300:
+                        return parse_google_correction(r.text)
+                    tqdm.write(
+                        f'WARN: Request returned status code: {r.status_code}. Your IP address may be blocked by google.')
+
+                self._increment('google-request-errors')
+                if attempt < self.max_retries:
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+        return None
+
+    def _increment(self, key):
+        self.count[key] = self.count.get(key, 0) + 1
+
+
+def parse_google_correction(html):
+    '''
+    Returns the suggested words from a google search page's "Did you mean: ...",
+    an empty list if there are none, or None if the page has no search results
+    '''
+    soup = BeautifulSoup(html, 'html.parser')
+
+    main_content = soup.find('div', id='main')
+    if not main_content:
+        tqdm.write(
+            f'WARN: No content found on google search. You may have hit a spam block/captcha.')
+        return
+
+    for a_tag in main_content.find_all('a', href=re.compile('/search')):
+        if ('Did you mean' in a_tag.parent.text or
+                'Showing results for' in a_tag.parent.text):
+            suggested_words = [b.text for b in a_tag.find_all('b')]
+            return suggested_words
+    return []
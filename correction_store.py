@@ -0,0 +1,70 @@
+import json
+import sqlite3
+import time
+
+# Kinds of results kept in the correction store
+KIND_GOOGLE = 'google'  # Suggested words from a google search
+KIND_SPACY = 'spacy'  # Spacy contextual spellcheck verdict for a suggestion
+KIND_CORRECTION = 'correction'  # Final correction chosen for a misspelling
+
+
+class CorrectionStore:
+    '''
+    Persistent SQLite store of google search results, spacy verdicts and chosen corrections,
+    shared across runs so work done for a misspelling is not repeated.
+    Entries expire after ttl seconds, and the least recently used entries are
+    evicted once the store holds more than max_entries.
+    '''
+
+    def __init__(self, path, ttl=30*24*60*60, max_entries=1000000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Several worker processes may share the store, and it may be opened by a different
+        # thread to the one using it, e.g. the verification stage of a pipelined run
+        self.conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''CREATE TABLE IF NOT EXISTS entries (
+                                 kind TEXT NOT NULL,
+                                 key TEXT NOT NULL,
+                                 value TEXT NOT NULL,
+                                 created REAL NOT NULL,
+                                 accessed REAL NOT NULL,
+                                 PRIMARY KEY (kind, key))''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+        self.evict()
+
+    def get(self, kind, key):
+        ''' Returns the stored value, or None if there is no unexpired entry '''
+        row = self.conn.execute('SELECT value, created FROM entries WHERE kind = ? AND key = ?',
+                                (kind, key)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        now = time.time()
+        if now - created > self.ttl:
+            return None
+        self.conn.execute('UPDATE entries SET accessed = ? WHERE kind = ? AND key = ?', (now, kind, key))
+        return json.loads(value)
+
+    def set(self, kind, key, value):
+        now = time.time()
+        self.conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                          (kind, key, json.dumps(value), now, now))
+
+    def commit(self):
+        self.conn.commit()
+
+    def evict(self):
+        ''' Deletes expired entries and the least recently used entries over max_entries '''
+        self.conn.execute('DELETE FROM entries WHERE created < ?', (time.time() - self.ttl,))
+        (size,) = self.conn.execute('SELECT COUNT(*) FROM entries').fetchone()
+        if size > self.max_entries:
+            self.conn.execute('''DELETE FROM entries WHERE rowid IN (
+                                     SELECT rowid FROM entries ORDER BY accessed LIMIT ?)''',
+                              (size - self.max_entries,))
+        self.conn.commit()
+
+    def close(self):
+        self.evict()
+        self.conn.close()
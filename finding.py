@@ -0,0 +1,58 @@
+import sys
+import urllib.parse
+
+
+class Finding:
+    '''
+    A misspelt word found in a row of text. Findings use __slots__ rather than a dict as
+    there can be millions of them, words are interned as the same misspellings repeat,
+    and the google search urls are only built when the finding is written out.
+    '''
+    __slots__ = ('word', 'row', 'context', 'suggestions', 'correction',
+                 'index', 'start', 'end', 'context_start')
+
+    def __init__(self, word, row, context, suggestions=(), correction=None,
+                 index=None, start=None, end=None, context_start=None):
+        self.word = sys.intern(word)
+        self.row = row
+        self.context = context
+        self.suggestions = tuple(suggestions)
+        self.correction = correction
+        self.index = index  # Position of the word's token in text.split()
+        self.start = start  # Character span of the word in the text
+        self.end = end
+        self.context_start = context_start  # Character offset of the word in the context
+
+    def __repr__(self):
+        return f'Finding({self.word!r}, row={self.row!r}, correction={self.correction!r})'
+
+    def __eq__(self, other):
+        if not isinstance(other, Finding):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def copy(self, row, exact=True):
+        '''
+        Returns a copy of the finding for another row. If the row's text is not exactly the same,
+        the word's character span is unknown
+        '''
+        return Finding(self.word, row, self.context, self.suggestions, self.correction,
+                       self.index, self.start if exact else None, self.end if exact else None,
+                       self.context_start)
+
+    def search_word_url(self, search_url):
+        ''' Returns the url searching for the word '''
+        return search_url + urllib.parse.quote_plus(self.word)
+
+    def search_context_url(self, search_url):
+        ''' Returns the url searching for the word's context '''
+        return search_url + urllib.parse.quote_plus(self.context)
+
+    def to_dict(self):
+        ''' Returns the finding as a JSON serializable dict '''
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        ''' Returns a finding from a dict returned by to_dict, ignoring unknown keys '''
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
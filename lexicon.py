@@ -0,0 +1,124 @@
+import hashlib
+import json
+import mmap
+import os
+from functools import lru_cache
+
+from english_words import (english_words_lower_alpha_set,
+                           english_words_lower_set)
+
+from profiler import STAGE_ENCHANT_CHECK, Profiler
+
+# Version of the compiled dictionary file format
+COMPILED_DICT_VERSION = 1
+
+# Lexicon sources, in the order they are checked
+SOURCE_CUSTOM = 'custom'
+SOURCE_ENGLISH_WORDS = 'english_words'
+
+
+class Lexicon:
+    '''
+    Index of all known words, merging the custom dictionary and the english_words
+    word lists into one dict built once at startup. Enchant dictionaries are only
+    checked as a fallback for words not in the index, and their results are memoized.
+    '''
+
+    def __init__(self, custom_words=(), enchant_dicts=(), enchant_cache_size=100000, profiler=None):
+        # Map each known word to the first source it was found in
+        self.words = {}
+        for word in english_words_lower_alpha_set:
+            self.words[word] = SOURCE_ENGLISH_WORDS
+        for word in english_words_lower_set:
+            self.words[word] = SOURCE_ENGLISH_WORDS
+        for word in custom_words:
+            self.words[word] = SOURCE_CUSTOM
+
+        # List of (source name, enchant.Dict) tuples
+        self.enchant_dicts = list(enchant_dicts)
+        self.profiler = profiler or Profiler(enabled=False)
+        self._check_enchant = lru_cache(maxsize=enchant_cache_size)(self._check_enchant)
+
+    def __contains__(self, word):
+        return self.lookup(word) is not None
+
+    def __len__(self):
+        return len(self.words)
+
+    def lookup(self, word):
+        ''' Returns the name of the source the lowercase word is known by, else None '''
+        source = self.words.get(word)
+        if source:
+            return source
+        return self._check_enchant(word)
+
+    def _check_enchant(self, word):
+        with self.profiler.stage(STAGE_ENCHANT_CHECK):
+            for source, enchant_dict in self.enchant_dicts:
+                if enchant_dict.check(word):
+                    return source
+        return None
+
+    def enchant_cache_info(self):
+        ''' Returns the hits and misses of the memoized enchant lookups '''
+        return self._check_enchant.cache_info()
+
+
+### COMPILED DICTIONARY FILE ###
+# The compiled dictionary file is a JSON header line describing the dictionary
+# file it was compiled from, followed by one sorted, lowercase word per line.
+
+def file_hash(path):
+    ''' Returns the sha1 hash of a file's contents '''
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_header(source_file, source_hash=None):
+    stat = os.stat(source_file)
+    return {'version': COMPILED_DICT_VERSION,
+            'source_mtime': stat.st_mtime,
+            'source_size': stat.st_size,
+            'source_hash': source_hash or file_hash(source_file)}
+
+
+def read_compiled_dictionary(compiled_file, source_file):
+    '''
+    Returns the list of words in the compiled dictionary file, or None if it does not
+    exist or is out of date with the source dictionary file
+    '''
+    if not os.path.exists(compiled_file) or os.path.getsize(compiled_file) == 0:
+        return None
+
+    with open(compiled_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = mm.find(b'\n')
+            try:
+                header = json.loads(mm[:header_end if header_end >= 0 else len(mm)])
+            except ValueError:
+                return None
+            if header.get('version') != COMPILED_DICT_VERSION:
+                return None
+
+            # Only hash the source file if it has been modified since it was compiled
+            stat = os.stat(source_file)
+            if (stat.st_mtime != header['source_mtime'] or stat.st_size != header['source_size']):
+                if file_hash(source_file) != header['source_hash']:
+                    return None
+
+            if header_end < 0 or header_end == len(mm) - 1:
+                return []
+            return mm[header_end+1:].decode('utf-8').split('\n')
+
+
+def write_compiled_dictionary(compiled_file, source_file, words, source_hash=None):
+    ''' Writes the words to the compiled dictionary file for the source dictionary file '''
+    header = _source_header(source_file, source_hash)
+    tmp_file = compiled_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(json.dumps(header) + '\n')
+        f.write('\n'.join(sorted(words)))
+    os.replace(tmp_file, compiled_file)
@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import threading
+
+from finding import Finding
+
+
+class Manifest:
+    '''
+    Record of the text checked and the findings of the last spell check run, used to only
+    re-check text which has changed since then. Texts are keyed by their hash so unchanged
+    text that has moved to a different row is not re-checked either.
+
+    Findings are read from the previous manifest file and a new manifest is written alongside
+    it during the run, replacing the previous one when the run is saved.
+    The manifest may be shared by the threads of a pipelined run, so access is serialized with a lock.
+    '''
+
+    def __init__(self, path, options, dictionary_words):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.options = options
+        self.dictionary_words = set(dictionary_words)
+
+        self.lock = threading.RLock()
+        self.prev = None
+        # Words added to or removed from the dictionary since the previous run
+        self.changed_words = set()
+        if os.path.exists(path):
+            self.prev = sqlite3.connect(path, check_same_thread=False)
+            prev_options = self._get_meta(self.prev, 'options')
+            if prev_options != options:
+                # Findings depend on the spell check options, so re-check everything
+                self.prev.close()
+                self.prev = None
+            else:
+                prev_dictionary_words = set(self._get_meta(self.prev, 'dictionary_words') or [])
+                self.changed_words = self.dictionary_words ^ prev_dictionary_words
+
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+        self.new = sqlite3.connect(self.tmp_path, check_same_thread=False)
+        self.new.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        self.new.execute('''CREATE TABLE texts (hash TEXT PRIMARY KEY,
+                                                custom_words TEXT NOT NULL)''')
+        self.new.execute('''CREATE TABLE findings (hash TEXT NOT NULL,
+                                                   corrected INTEGER NOT NULL,
+                                                   data TEXT NOT NULL)''')
+        self.new.execute('CREATE INDEX findings_hash ON findings (hash)')
+        self._set_meta('options', options)
+        self._set_meta('dictionary_words', sorted(self.dictionary_words))
+
+    def _get_meta(self, conn, key):
+        try:
+            row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _set_meta(self, key, value):
+        self.new.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, json.dumps(value)))
+
+    def get_prev(self, text_hash):
+        '''
+        Returns a (custom words, findings) tuple for the text from the previous run, where findings
+        is a list of (corrected, finding) tuples, or None if the text was not checked or must be
+        re-checked as its words have changed dictionary status
+        '''
+        if self.prev is None:
+            return None
+        with self.lock:
+            row = self.prev.execute('SELECT custom_words FROM texts WHERE hash = ?', (text_hash,)).fetchone()
+            if row is None:
+                return None
+            rows = self.prev.execute('SELECT corrected, data FROM findings WHERE hash = ? ORDER BY rowid',
+                                     (text_hash,)).fetchall()
+        findings = [(bool(corrected), Finding.from_dict(json.loads(data))) for corrected, data in rows]
+
+        custom_words = json.loads(row[0])
+        if self.changed_words:
+            words = set(custom_words)
+            words.update(finding.word.lower() for corrected, finding in findings)
+            if not words.isdisjoint(self.changed_words):
+                return None
+        return custom_words, findings
+
+    def add_text(self, text_hash, custom_words):
+        '''
+        Records text checked in this run, with the custom dictionary words it contains.
+        Returns False if the text has already been recorded.
+        '''
+        with self.lock:
+            cursor = self.new.execute('INSERT OR IGNORE INTO texts VALUES (?, ?)',
+                                      (text_hash, json.dumps(sorted(custom_words))))
+            return cursor.rowcount == 1
+
+    def add_finding(self, text_hash, corrected, finding):
+        with self.lock:
+            self.new.execute('INSERT INTO findings VALUES (?, ?, ?)',
+                             (text_hash, int(corrected), json.dumps(finding.to_dict())))
+
+    def commit(self):
+        with self.lock:
+            self.new.commit()
+
+    def save(self):
+        ''' Replaces the previous manifest with the one written during this run '''
+        self.new.commit()
+        self.new.close()
+        if self.prev is not None:
+            self.prev.close()
+        os.replace(self.tmp_path, self.path)
+
+    def close(self):
+        ''' Discards the manifest written during this run, keeping the previous one '''
+        self.new.close()
+        if self.prev is not None:
+            self.prev.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
@@ -0,0 +1,102 @@
+import queue
+import threading
+
+_CLOSED = object()  # Put on a stage queue once its producers have finished
+
+
+class PipelineStopped(Exception):
+    ''' Raised in a stage when another stage has failed and the pipeline is stopping '''
+
+
+class StageQueue:
+    '''
+    Bounded queue between pipeline stages. Producers block once it holds maxsize items,
+    so fast stages cannot run arbitrarily far ahead of slow ones.
+    '''
+
+    def __init__(self, pipeline, name, maxsize):
+        self.pipeline = pipeline
+        self.name = name
+        self._queue = queue.Queue(maxsize)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    def put(self, item):
+        # Wait in short intervals so producers stop if another stage fails
+        while True:
+            if self.pipeline.stopped.is_set():
+                raise PipelineStopped
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def close(self):
+        ''' Marks the end of the items put on the queue '''
+        self.put(_CLOSED)
+
+    def __iter__(self):
+        ''' Yields items until the queue is closed '''
+        while True:
+            if self.pipeline.stopped.is_set():
+                raise PipelineStopped
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _CLOSED:
+                return
+            yield item
+
+
+class Pipeline:
+    '''
+    Runs stages in their own threads, connected by bounded StageQueues. Each stage reads
+    from its input queue and puts its results on one or more output queues, which are
+    closed when the stage finishes. If a stage raises an exception the other stages are
+    stopped and the exception is raised by run.
+    '''
+
+    def __init__(self):
+        self.stopped = threading.Event()
+        self.queues = []
+        self.threads = []
+        self.errors = []
+
+    def queue(self, name, maxsize):
+        stage_queue = StageQueue(self, name, maxsize)
+        self.queues.append(stage_queue)
+        return stage_queue
+
+    def add_stage(self, name, func, outputs=()):
+        ''' Adds a stage running func() in a thread, closing the output queues when it returns '''
+        def run_stage():
+            try:
+                func()
+                for output in outputs:
+                    output.close()
+            except PipelineStopped:
+                pass
+            except BaseException as e:
+                self.errors.append(e)
+                self.stopped.set()
+        self.threads.append(threading.Thread(target=run_stage, name=name, daemon=True))
+
+    def queue_depths(self):
+        ''' Returns a dict of the number of items waiting in each queue '''
+        return {stage_queue.name: stage_queue.qsize() for stage_queue in self.queues}
+
+    def run(self):
+        ''' Runs the stages until they have all finished '''
+        for thread in self.threads:
+            thread.start()
+        try:
+            for thread in self.threads:
+                thread.join()
+        except KeyboardInterrupt:
+            self.stopped.set()
+            raise
+        if self.errors:
+            raise self.errors[0]
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Stages of a spell check run timed by the profiler. Stages may be nested, e.g.
+# dictionary lookups include the enchant checks of words not in the lexicon index
+STAGE_LOAD_DICTIONARY = 'load-dictionary'  # Loading the dictionary file and building the lexicon
+STAGE_BUILD_SUGGESTER = 'build-suggester'  # Building the suggestion engine's index
+STAGE_CORPUS_STATS = 'corpus-stats'  # Counting the input text's word frequencies
+STAGE_READ_INPUT = 'read-input'  # Reading rows from the input file
+STAGE_TOKENIZE = 'tokenize'  # Tokenizing each row
+STAGE_LOOKUP = 'dictionary-lookup'  # Looking up words not in the token cache
+STAGE_ENCHANT_CHECK = 'enchant-check'  # Checking words not in the lexicon index with enchant
+STAGE_SUGGEST = 'suggest'  # Getting suggestions for misspelt words
+STAGE_SPACY = 'spacy'  # Running candidate texts through the spacy pipeline
+STAGE_GOOGLE = 'google'  # Waiting on google searches, which run in the background
+STAGE_WRITE = 'write-results'  # Writing findings and saving the result file
+
+_NULL_STAGE = nullcontext()
+
+
+class Profiler:
+    '''
+    Records the call count and cumulative time of each stage of a spell check run.
+    Stages are timed with "with profiler.stage(name):" blocks, which do nothing while the
+    profiler is disabled.
+    '''
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = {}  # Stage name to [calls, seconds]
+        self.start_time = time.perf_counter()
+        # Stages may be timed by several threads at once
+        self.lock = threading.Lock()
+
+    def stage(self, name, calls=1):
+        ''' Returns a context manager timing a block of code as calls calls of the stage '''
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._time_stage(name, calls)
+
+    @contextmanager
+    def _time_stage(self, name, calls):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time, calls)
+
+    def iter(self, iterable, name):
+        ''' Yields the items of the iterable, timing each item as a call of the stage '''
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.add(name, time.perf_counter() - start_time)
+            yield item
+
+    def add(self, name, seconds, calls=1):
+        with self.lock:
+            stage = self.stages.setdefault(name, [0, 0.0])
+            stage[0] += calls
+            stage[1] += seconds
+
+    def merge(self, stages):
+        ''' Adds the stages of another profiler's report, e.g. from a worker process '''
+        for name, stage in stages.items():
+            self.add(name, stage['seconds'], stage['calls'])
+
+    def reset(self):
+        self.stages = {}
+        self.start_time = time.perf_counter()
+
+    def report(self, **extra):
+        '''
+        Returns a JSON serializable dict of the time taken by each stage, with any extra items.
+        Stages timed in several worker processes or threads at once can take more than the total time.
+        '''
+        total = time.perf_counter() - self.start_time
+        report = {'total_seconds': total,
+                  'stages': {name: {'calls': calls,
+                                    'seconds': seconds,
+                                    'percent': 100 * seconds / total if total else 0}
+                             for name, (calls, seconds) in sorted(self.stages.items(),
+                                                                  key=lambda item: -item[1][1])}}
+        report.update(extra)
+        return report
+
+    def save(self, path, **extra):
+        ''' Saves the report to a JSON file and returns it '''
+        report = self.report(**extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def format_report(report):
+    ''' Returns the stages of a profiler report as a table '''
+    lines = [f'{"Stage":<20}{"Calls":>12}{"Seconds":>12}{"%":>8}']
+    for name, stage in report['stages'].items():
+        lines.append(f'{name:<20}{stage["calls"]:>12,}{stage["seconds"]:>12.2f}{stage["percent"]:>8.1f}')
+    lines.append(f'{"total":<20}{"":>12}{report["total_seconds"]:>12.2f}')
+    return '\n'.join(lines)
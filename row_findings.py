@@ -0,0 +1,33 @@
+import json
+import sqlite3
+
+from finding import Finding
+
+
+class RowFindings:
+    '''
+    Findings stored for each row of a spell check run, used to copy the findings of a row to
+    later rows with the same text. Findings are spilled to a temporary SQLite file, which is
+    deleted when closed, so they are not held in memory for the whole run.
+    '''
+
+    def __init__(self):
+        # An empty path opens a temporary database, which may be used by the threads of a
+        # pipelined run. Callers serialize access with a lock
+        self.conn = sqlite3.connect('', check_same_thread=False)
+        self.conn.execute('''CREATE TABLE findings (row INTEGER NOT NULL,
+                                                    corrected INTEGER NOT NULL,
+                                                    data TEXT NOT NULL)''')
+        self.conn.execute('CREATE INDEX findings_row ON findings (row)')
+
+    def add(self, row, corrected, finding):
+        self.conn.execute('INSERT INTO findings VALUES (?, ?, ?)',
+                          (row, int(corrected), json.dumps(finding.to_dict())))
+
+    def get(self, row):
+        ''' Returns a list of (corrected, finding) tuples stored for the row '''
+        rows = self.conn.execute('SELECT corrected, data FROM findings WHERE row = ? ORDER BY rowid', (row,))
+        return [(bool(corrected), Finding.from_dict(json.loads(data))) for corrected, data in rows]
+
+    def close(self):
+        self.conn.close()
@@ -2,7 +2,7 @@ import spellchecker as sc
 import sys
 
 if __name__ == "__main__":
-    sc = sc.SpellChecker()
+    sc = sc.SpellChecker(_spacy='--no-spacy' not in sys.argv[1:])
 
     kwargs = {}
     for arg in sys.argv[1:]:
@@ -14,6 +14,30 @@ if __name__ == "__main__":
             kwargs['suggest'] = False
         if arg == '--no-google':
             kwargs['google_sc'] = False
+        if arg == '--incremental':
+            kwargs['incremental'] = True
+        if arg == '--no-dedupe':
+            kwargs['dedupe'] = False
+        if arg == '--no-cache':
+            sc.correction_store_file = None
+        if arg.startswith('--workers='):
+            kwargs['workers'] = int(arg.split('=', 1)[1])
+        if arg.startswith('--suggestions='):
+            kwargs['suggestion_engine'] = arg.split('=', 1)[1]
+        if arg == '--corpus-stats':
+            kwargs['corpus_stats'] = True
+        if arg == '--no-cascade':
+            kwargs['cascade'] = False
+        if arg == '--profile':
+            kwargs['profile'] = True
+        if arg == '--pipeline':
+            kwargs['pipeline'] = True
+        if arg == '--resume':
+            kwargs['resume'] = True
+        if arg.startswith('--queue-size='):
+            kwargs['queue_size'] = int(arg.split('=', 1)[1])
+        if arg.startswith('--correct-workers='):
+            kwargs['correct_workers'] = int(arg.split('=', 1)[1])
     
     sc.spell_check_text(**kwargs)
     
\ No newline at end of file
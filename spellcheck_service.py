@@ -0,0 +1,295 @@
+'''
+Long running spell check service, keeping a warm SpellChecker (dictionaries, enchant,
+the spacy pipeline and caches) loaded between requests.
+
+Usage: python spellcheck_service.py [--host=127.0.0.1] [--port=8765] [--socket=PATH]
+       [--batch-wait=0.01] [--max-batch-texts=1024] [--no-spacy] [--suggestions=enchant|symspell]
+
+Endpoints:
+    POST /check    {"texts": ["..."], "auto": true, "suggest": true, "num_context_words": 5}
+                   returns {"findings": [{"row": 0, "word": "...", "correction": "...", ...}]},
+                   where row is the position of the text in the request
+    POST /reload   reloads dictionary.xlsx
+    GET  /metrics  returns throughput and latency metrics
+    GET  /health   returns {"status": "ok"}
+'''
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from spellchecker import SpellChecker
+
+# Options a check request may set, with their defaults
+CHECK_OPTIONS = {'auto': True, 'suggest': True, 'num_context_words': 5}
+
+
+class CheckRequest:
+    ''' A request to check a list of texts, completed by the batcher thread '''
+
+    def __init__(self, texts, options):
+        self.texts = texts
+        self.options = options
+        self.findings = []
+        self.error = None
+        self.done = threading.Event()
+        self.start_time = time.perf_counter()
+
+
+class SpellCheckService:
+    '''
+    Checks texts with a single warm SpellChecker. Requests are queued and a batcher thread
+    combines the requests which arrive within batch_wait seconds of each other, up to
+    max_batch_texts texts, into one check so their contextual checks run through the spacy
+    pipeline together. The dictionary is reloaded when dictionary.xlsx changes.
+    '''
+
+    def __init__(self, sc, batch_wait=0.01, max_batch_texts=1024, latency_window=1000):
+        self.sc = sc
+        self.batch_wait = batch_wait
+        self.max_batch_texts = max_batch_texts
+
+        self.requests = queue.Queue()
+        self.reload_requested = threading.Event()
+        self.dictionary_mtime = None
+
+        # Metrics
+        self.start_time = time.time()
+        self.metrics_lock = threading.Lock()
+        self.count = defaultdict(int)
+        self.latencies = deque(maxlen=latency_window)  # Seconds taken by the latest requests
+        self.batch_sizes = deque(maxlen=latency_window)  # Texts in the latest batches
+
+        self.thread = threading.Thread(target=self._run_batcher, daemon=True)
+
+    def start(self):
+        ''' Loads the dictionaries and spacy pipeline, then starts the batcher thread '''
+        self.dictionary_mtime = self._get_dictionary_mtime()
+        self.sc._prepare_check()
+        if self.sc.use_spacy:
+            self.sc.nlp  # noqa: B018 loads the pipeline before the first request
+        self.thread.start()
+
+    def check(self, texts, options=None):
+        ''' Queues texts to be checked, waits for them and returns the list of findings '''
+        request = CheckRequest(texts, dict(CHECK_OPTIONS, **(options or {})))
+        self.requests.put(request)
+        request.done.wait()
+        latency = time.perf_counter() - request.start_time
+        with self.metrics_lock:
+            self.count['requests'] += 1
+            self.count['texts'] += len(texts)
+            self.count['findings'] += len(request.findings)
+            if request.error:
+                self.count['request-errors'] += 1
+            self.latencies.append(latency)
+        if request.error:
+            raise request.error
+        return request.findings
+
+    def reload(self):
+        ''' Reloads the dictionary before the next batch '''
+        self.reload_requested.set()
+
+    def metrics(self):
+        ''' Returns a JSON serializable dict of throughput and latency metrics '''
+        with self.metrics_lock:
+            uptime = time.time() - self.start_time
+            latencies = sorted(self.latencies)
+            batch_sizes = list(self.batch_sizes)
+            count = dict(self.count)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else None
+
+        return {'uptime_seconds': uptime,
+                'requests': count.get('requests', 0),
+                'request_errors': count.get('request-errors', 0),
+                'texts': count.get('texts', 0),
+                'findings': count.get('findings', 0),
+                'batches': count.get('batches', 0),
+                'dictionary_reloads': count.get('dictionary-reloads', 0),
+                'queued_requests': self.requests.qsize(),
+                'texts_per_sec': count.get('texts', 0) / uptime if uptime else 0,
+                'requests_per_sec': count.get('requests', 0) / uptime if uptime else 0,
+                'latency_seconds': {'mean': sum(latencies) / len(latencies) if latencies else None,
+                                    'p50': percentile(50),
+                                    'p95': percentile(95),
+                                    'p99': percentile(99),
+                                    'max': latencies[-1] if latencies else None},
+                'mean_batch_texts': sum(batch_sizes) / len(batch_sizes) if batch_sizes else None,
+                'spell_checker': dict(self.sc.count)}
+
+    def _get_dictionary_mtime(self):
+        try:
+            return os.path.getmtime(self.sc.word_dict_file)
+        except OSError:
+            return None
+
+    def _run_batcher(self):
+        while True:
+            batch = [self.requests.get()]
+            num_texts = len(batch[0].texts)
+            deadline = time.perf_counter() + self.batch_wait
+            while num_texts < self.max_batch_texts:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                num_texts += len(request.texts)
+
+            try:
+                if self.reload_requested.is_set() or self._get_dictionary_mtime() != self.dictionary_mtime:
+                    self.reload_requested.clear()
+                    self.dictionary_mtime = self._get_dictionary_mtime()
+                    try:
+                        self.sc.reload_dictionary()
+                    except Exception as e:  # Keep serving with the previous dictionary
+                        print(f'WARN: Could not reload dictionary: {e}', file=sys.stderr)
+                    else:
+                        with self.metrics_lock:
+                            self.count['dictionary-reloads'] += 1
+
+                # Requests can only be checked together if they use the same options
+                groups = defaultdict(list)
+                for request in batch:
+                    groups[tuple(sorted(request.options.items()))].append(request)
+                for requests in groups.values():
+                    self._check_requests(requests)
+            except Exception as e:  # Fail the batch's requests rather than the batcher thread
+                for request in batch:
+                    if not request.done.is_set():
+                        request.error = e
+                        request.done.set()
+            with self.metrics_lock:
+                self.count['batches'] += 1
+                self.batch_sizes.append(num_texts)
+
+    def _check_requests(self, requests):
+        ''' Checks the texts of requests with the same options in a single pass '''
+        rows = (((i, j), text) for i, request in enumerate(requests) for j, text in enumerate(request.texts))
+        try:
+            for finding in self.sc.check_stream(rows, chunk_size=self.max_batch_texts, **requests[0].options):
+                i, finding.row = finding.row
+                requests[i].findings.append(finding.to_dict())
+        except Exception as e:
+            for request in requests:
+                request.error = e
+        for request in requests:
+            request.findings.sort(key=lambda finding: (finding['row'], finding['index']))
+            request.done.set()
+
+
+class SpellCheckRequestHandler(BaseHTTPRequestHandler):
+    service = None  # SpellCheckService, set on the server's handler class
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send_json(200, self.service.metrics())
+        elif self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        else:
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+
+    def do_POST(self):
+        if self.path == '/reload':
+            self.service.reload()
+            self._send_json(200, {'status': 'reloading'})
+            return
+        if self.path != '/check':
+            self._send_json(404, {'error': f'Unknown path: {self.path}'})
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            texts = body['texts']
+            if not isinstance(texts, list) or not all(isinstance(t, str) or t is None for t in texts):
+                raise ValueError('"texts" must be a list of strings')
+            options = {key: body[key] for key in CHECK_OPTIONS if key in body}
+            for key in ('auto', 'suggest'):
+                if not isinstance(options.get(key, True), bool):
+                    raise ValueError(f'"{key}" must be a boolean')
+            num_context_words = options.get('num_context_words', 0)
+            if isinstance(num_context_words, bool) or not isinstance(num_context_words, int) or num_context_words < 0:
+                raise ValueError('"num_context_words" must be a non-negative integer')
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': f'Invalid request: {e}'})
+            return
+
+        try:
+            findings = self.service.check(texts, options)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, {'findings': findings})
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, host='127.0.0.1', port=8765, socket_path=None):
+    ''' Returns an HTTP server for the service, listening on a Unix socket if socket_path is given '''
+    handler = type('Handler', (SpellCheckRequestHandler,), {'service': service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    sc_kwargs = {}
+    service_kwargs = {}
+    server_kwargs = {}
+    for arg in sys.argv[1:]:
+        if arg == '--no-spacy':
+            sc_kwargs['_spacy'] = False
+        if arg.startswith('--host='):
+            server_kwargs['host'] = arg.split('=', 1)[1]
+        if arg.startswith('--port='):
+            server_kwargs['port'] = int(arg.split('=', 1)[1])
+        if arg.startswith('--socket='):
+            server_kwargs['socket_path'] = arg.split('=', 1)[1]
+        if arg.startswith('--batch-wait='):
+            service_kwargs['batch_wait'] = float(arg.split('=', 1)[1])
+        if arg.startswith('--max-batch-texts='):
+            service_kwargs['max_batch_texts'] = int(arg.split('=', 1)[1])
+
+    sc = SpellChecker(**sc_kwargs)
+    for arg in sys.argv[1:]:
+        if arg.startswith('--suggestions='):
+            sc.suggestion_engine = arg.split('=', 1)[1]
+    service = SpellCheckService(sc, **service_kwargs)
+    print('Loading spell checker...')
+    service.start()
+
+    server = make_server(service, **server_kwargs)
+    print(f'Spell check service listening on {server_kwargs.get("socket_path") or server.server_address}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -1,29 +1,81 @@
+import csv
 import difflib
+import hashlib
+import itertools
+import multiprocessing
+import os
 import re
 import sys
+import threading
 import time
-import urllib
-from collections import defaultdict
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future
 from datetime import timedelta
 
-import contextualSpellCheck
 import enchant
-import requests
-import spacy
-from bs4 import BeautifulSoup
-from english_words import (english_words_lower_alpha_set,
-                           english_words_lower_set)
 from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Font
 from openpyxl.utils import get_column_letter
 from tqdm import tqdm
 
+from checkpoint import Checkpoint
+from corpus import CorpusStats
+from correction_store import (KIND_CORRECTION, KIND_GOOGLE, KIND_SPACY,
+                              CorrectionStore)
+from finding import Finding
+from lexicon import (Lexicon, read_compiled_dictionary,
+                     write_compiled_dictionary)
+from manifest import Manifest
+from pipeline import Pipeline
+from profiler import (STAGE_BUILD_SUGGESTER, STAGE_CORPUS_STATS, STAGE_GOOGLE,
+                      STAGE_LOAD_DICTIONARY, STAGE_LOOKUP, STAGE_READ_INPUT,
+                      STAGE_SPACY, STAGE_SUGGEST, STAGE_TOKENIZE, STAGE_WRITE,
+                      Profiler, format_report)
+from row_findings import RowFindings
+from suggester import (ENGINE_ENCHANT, ENGINE_SYMSPELL, EnchantSuggester,
+                       SymSpellSuggester, edit_distance)
+from tokenizer import (SKIP_PUNCTUATION, get_skip_reason, get_token_spans,
+                       get_token_word_span, normalize_token, tokenize)
+
 headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
            '(KHTML, like Gecko) Chrome/88.0.4324.190 Safari/537.36'}
 
+# Result worksheet columns. The token index and character span columns are hidden
+SUGGESTION_COLUMNS = ['suggestion_1', 'suggestion_2', 'suggestion_3']
+SPAN_COLUMNS = ['index', 'start', 'end']
+NOT_CORRECTED_COLUMNS = ['user_action', 'word', 'row', 'context'] + SUGGESTION_COLUMNS + SPAN_COLUMNS
+CORRECTED_COLUMNS = ['user_action', 'word', 'correction', 'row', 'context'] + SUGGESTION_COLUMNS + SPAN_COLUMNS
+
+# User actions which do not change the word
+USER_ACTION_ADD = object()
+USER_ACTION_DELETE = object()
+
+# Token verdicts stored in the token cache
+TOKEN_SKIPPED = 'skipped'
+TOKEN_KNOWN = 'known'
+TOKEN_MISSPELLED = 'misspelled'
+
+# Tiers of correction checks, in the order misspellings pass through them
+TIER_STORE = 'store'  # Corrections chosen in previous runs
+TIER_CORPUS = 'corpus'  # Suggestions far more common in the input text
+TIER_EDIT_DISTANCE = 'edit-distance'  # Suggestions clearly closest to the misspelt word
+TIER_SPACY = 'spacy'  # Suggestions passing the spacy contextual spellcheck
+TIER_GOOGLE = 'google'  # Google "Did you mean: ..." corrections
+TIERS = [TIER_STORE, TIER_CORPUS, TIER_EDIT_DISTANCE, TIER_SPACY, TIER_GOOGLE]
+
+# Counts of rows skipped before checking, which are counted again when a run is resumed
+# from a checkpoint as the rows up to the checkpoint are read again
+ROW_FILTER_COUNTS = ['rows-changed', 'rows-unchanged', 'rows-duplicate', 'rows-checkpointed']
+
 
 class SpellChecker:
-    def __init__(self, _spacy=True):
+    def __init__(self, _spacy=True, token_cache_size=100000, spacy_cache_size=100000):
+        # Keep constructor arguments so worker processes can build their own SpellChecker
+        self.init_kwargs = {'_spacy': _spacy,
+                            'token_cache_size': token_cache_size,
+                            'spacy_cache_size': spacy_cache_size}
+
         # Input file must contain text to spellcheck
         # on the first sheet and listed in column A,
         # or with the column header 'Text'
@@ -38,283 +90,1119 @@ class SpellChecker:
         # on the first sheet and listed in column A.
         # Words can be seperated in the same cell by pipes ' | '
         self.word_dict_file = 'dictionary.xlsx'
+        # Compiled copy of the dictionary file, rebuilt when the dictionary file changes
+        self.word_dict_compiled_file = 'dictionary.compiled'
+        # Persistent store of google, spacy and final correction results shared across runs.
+        # Set to None to disable
+        self.correction_store_file = 'corrections.sqlite3'
+        self._correction_store = None
+        # Record of the text checked and findings of the last incremental run
+        self.manifest_file = 'result.manifest'
+        # Checkpoint of the progress of a spell check run, saved every checkpoint_interval seconds
+        # so an unfinished run can be resumed. Deleted when the run finishes. Set to None to disable
+        self.checkpoint_file = 'result.checkpoint'
+        self.checkpoint_interval = 300
 
         self.word_dict = {}
+        # Index of all known words, built when the word dictionary is loaded
+        self.lexicon = None
         self.enchant_dict_US = enchant.Dict("en_US")
         self.enchant_dict_GB = enchant.Dict("en_GB")
-
-        # NLP Contextual Spell Checker
-        if _spacy:
-            tqdm.write('Loading Spacy pipeline...')
-            self.nlp = spacy.load("en_core_web_sm")
-            self.nlp.add_pipe('contextual spellchecker')
-            tqdm.write('Spacy loaded.')
+        # Engine used to suggest corrections for misspelt words, ENGINE_ENCHANT or ENGINE_SYMSPELL.
+        # The suggester is built with the lexicon
+        self.suggestion_engine = ENGINE_ENCHANT
+        self.suggester = None
+        # Word frequencies of the input text used to rank suggestions, if enabled
+        self.corpus_stats = None
+        # The edit distance tier corrects a misspelling with a single suggestion within
+        # single_suggestion_max_distance edits, or with only one of its suggestions
+        # within closest_suggestion_max_distance edits
+        self.single_suggestion_max_distance = 2
+        self.closest_suggestion_max_distance = 1
+
+        # NLP Contextual Spell Checker, loaded on first use
+        self.use_spacy = _spacy
+        self._nlp = None
 
         self.corrected_words = []
         self.not_corrected_words = []
+        # Findings are streamed to the result writer instead of the lists above when it is open,
+        # or appended to the finding sink deque while check_stream is running
+        self.result_writer = None
+        self.finding_sink = None
+        # Queue of findings for the writer stage of a pipelined run
+        self.finding_queue = None
+        # RowFindings of each row when skipping duplicate rows, and the duplicate rows of each row
+        self.row_findings = None
+        self.duplicate_rows = {}
+        # Findings of duplicate rows are copied from the reader and writer stages of a pipelined run
+        self.duplicate_rows_lock = threading.Lock()
+        # Manifest of text checked in incremental runs, and the text hash of each row checked
+        self.manifest = None
+        self.manifest_row_hashes = {}
+        # Checkpoint of the current run
+        self.checkpoint = None
+
+        # Counters of the run. The stages of a pipelined run add to counters of their own thread,
+        # which are merged into these when each stage finishes
+        self._count = defaultdict(int)
+        self._stage_counts = threading.local()
+        # Time taken by each stage of a spell check run, only recorded when profiling
+        self.profiler = Profiler(enabled=False)
+        # Profile report of the last profiled run, saved to profile_file
+        self.profile_file = 'profile.json'
+        self.profile = None
+
+        # Verdicts for tokens already checked, shared across the whole run
+        self.token_cache = LRUCache(maxsize=token_cache_size)
+        # Spacy contextual spellcheck results keyed by (text hash, word)
+        self.spacy_cache = LRUCache(maxsize=spacy_cache_size)
+
+        # HTTP session for google searches, created on first use
+        self._session = None
+        # Background google search fetcher, created on first use
+        self._correction_fetcher = None
+        self.search_url = 'http://www.google.com/search?q='
+        self.google_rate = 1/3  # Max google searches per second
+        self.google_concurrency = 4  # Max concurrent google searches
+        # Deque of (misspelling, future, cached) tuples waiting on google searches
+        self.pending_google_corrections = deque()
+        # Misspellings left for google by a worker process, which are searched by the parent
+        # process so a single fetcher rate limits every search of the run. None unless a worker
+        self.google_misspellings = None
+
+    @property
+    def nlp(self):
+        ''' Spacy pipeline with the contextual spellchecker, loaded on first use '''
+        if self._nlp is None:
+            if not self.use_spacy:
+                raise RuntimeError('Spacy pipeline is disabled for this SpellChecker (_spacy=False)')
+            # Heavy imports (spacy, torch, transformers) are deferred until the pipeline is needed
+            import contextualSpellCheck  # noqa: F401 registers the 'contextual spellchecker' pipe
+            import spacy
 
-        self.count = defaultdict(int)
-
-        self.session = requests.Session()
-
-    def spell_check_text(self, num_context_words=5, auto=True, suggest=True, debug=False, google_sc=True):
+            tqdm.write('Loading Spacy pipeline...')
+            self._nlp = spacy.load("en_core_web_sm")
+            self._nlp.add_pipe('contextual spellchecker')
+            tqdm.write('Spacy loaded.')
+        return self._nlp
+
+    @property
+    def count(self):
+        ''' Counters of the run, or of the current stage of a pipelined run '''
+        return getattr(self._stage_counts, 'count', self._count)
+
+    @property
+    def correction_fetcher(self):
+        ''' Background google search fetcher, created on first use '''
+        if self._correction_fetcher is None:
+            from correction_fetcher import CorrectionFetcher
+            self._correction_fetcher = CorrectionFetcher(self.session, headers=headers,
+                                                         rate=self.google_rate,
+                                                         concurrency=self.google_concurrency,
+                                                         # The fetcher's thread counts searches
+                                                         # into the run's counters
+                                                         count=self._count)
+        return self._correction_fetcher
+
+    @property
+    def correction_store(self):
+        ''' Persistent correction store, opened on first use, or None if disabled '''
+        if self._correction_store is None and self.correction_store_file:
+            self._correction_store = CorrectionStore(self.correction_store_file)
+        return self._correction_store
+
+    @property
+    def session(self):
+        ''' HTTP session for google searches, created on first use '''
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
+
+    def spell_check_text(self, num_context_words=5, auto=True, suggest=True, debug=False, google_sc=True,
+                         chunk_size=256, spacy_batch_size=32, workers=1, incremental=False, dedupe=True,
+                         suggestion_engine=None, corpus_stats=False, cascade=True, profile=False,
+                         pipeline=False, queue_size=8, correct_workers=1, resume=False):
         '''
         Checks input sentences aginst custom word list as well as other english words lists
-        and outputs result to the output file
+        and outputs result to the output file.
+        With workers > 1, chunks of rows are spell checked in a pool of worker processes
+        and the results are merged back in row order.
+        With incremental=True, only text which has changed since the last incremental run, or
+        contains words added to or removed from the dictionary, is checked. Findings for
+        unchanged text are copied from the last run.
+        With dedupe=True, duplicate rows are only checked once and their findings are
+        copied to every row with the same text.
+        suggestion_engine selects how suggestions are generated, ENGINE_ENCHANT (the default)
+        or ENGINE_SYMSPELL, which looks words up in a precomputed index of the custom dictionary
+        and english word lists, falling back to enchant.
+        With corpus_stats=True, the word frequencies of the input text are counted in a first
+        pass over it. Suggestions are ranked by edit distance weighted by frequency, and
+        misspellings whose best suggestion is far more common in the text are corrected
+        without the spacy pipeline.
+        With cascade=True, misspellings whose suggestions include one clearly closest to the
+        word are corrected without the spacy pipeline.
+        With pipeline=True, reading rows, checking words against the dictionaries, correcting
+        misspellings and writing results run concurrently in their own threads, connected by
+        queues of up to queue_size chunks of rows. With correct_workers > 1, misspellings are
+        corrected in that many worker processes, each with its own spacy pipeline. Use
+        correct_workers rather than workers to check a pipelined run in parallel.
+        Unless pipeline=True, a checkpoint of the run's progress is saved to the checkpoint file
+        every checkpoint_interval seconds. With resume=True, the run continues from the checkpoint
+        of an unfinished run with the same input, dictionary and options: findings for the rows
+        up to the checkpoint are copied from it, and its counters and caches are restored.
+        With profile=True, the calls and time taken by each stage of the run are recorded,
+        printed, saved to the profile file as JSON and returned as a dict.
         '''
+        if resume and pipeline:
+            raise ValueError('Pipelined runs do not save checkpoints, so cannot be resumed')
+        if workers > 1 and pipeline:
+            raise ValueError('Parallel runs check rows in worker processes, so cannot also be pipelined')
         if debug:
             self.words = []
 
-        if not self.word_dict:
-            self._load_word_dict()
-
-        workbook = load_workbook(self.input_file)
-        worksheet = workbook.worksheets[0]
-
-        # Find column with 'text' as title cell
-        tqdm.write('Finding "Text" column...')
-        
-        col = self._get_column_with_title(worksheet, 'text', col_letter=True)
-        if not col:
-        # if not (col := self._get_column_with_title(worksheet, 'text', col_letter=True)):
-            col = get_column_letter(1)
-            row_start_idx = 0  # Row index to start from
-            tqdm.write(f'No column with title "text", defaulting to column {col}')
-        else:
-            row_start_idx = 1  # Ignore title row if it exists
-            tqdm.write(f'Column {col} has title "text"')
-
-        tqdm.write('Spell checking text...')
-        start_time = time.time()
-        # Iterate through each cell in text column
-        for cell in tqdm(worksheet[col][row_start_idx:]):
-            if not cell.value:
+        self.profiler.enabled = profile
+        self.profiler.reset()
+        # Clear the state of an earlier run which did not finish
+        self._end_run()
+
+        # Worker processes build their own suggester
+        self._prepare_check(suggest and workers <= 1, suggestion_engine)
+
+        if corpus_stats:
+            tqdm.write('Counting word frequencies...')
+            with self.profiler.stage(STAGE_CORPUS_STATS):
+                self.corpus_stats = print_process_time(
+                    'Counted word frequencies', CorpusStats.from_rows, iter_text_rows(self.input_file))
+            # Cached suggestions were not ranked by these frequencies
+            self.token_cache.clear()
+        elif self.corpus_stats is not None:
+            self.corpus_stats = None
+            self.token_cache.clear()
+
+        try:
+            # Write results to the result file as soon as each misspelling is classified
+            self.result_writer = ResultWriter(self.result_file, self.search_url)
+
+            tqdm.write('Spell checking text...')
+            start_time = time.time()
+            # Stream (row number, text) tuples from the input file
+            rows = self.profiler.iter(iter_text_rows(self.input_file), STAGE_READ_INPUT)
+            options = {'num_context_words': num_context_words,
+                       'auto': auto,
+                       'suggest': suggest,
+                       'google_sc': google_sc,
+                       'suggestion_engine': self.suggestion_engine,
+                       'corpus_stats': corpus_stats,
+                       'cascade': cascade}
+            if incremental:
+                self.manifest = Manifest(self.manifest_file, options, self.word_dict)
+                rows = self._skip_unchanged_rows(rows)
+            if dedupe:
+                self.row_findings = RowFindings()
+                rows = self._skip_duplicate_rows(rows)
+            if self.checkpoint_file and not pipeline:
+                input_stat = os.stat(self.input_file)
+                checkpoint_options = dict(options,
+                                          incremental=incremental,
+                                          dedupe=dedupe,
+                                          input_file=os.path.abspath(self.input_file),
+                                          input_size=input_stat.st_size,
+                                          input_mtime=input_stat.st_mtime,
+                                          dictionary=text_hash('\n'.join(sorted(self.word_dict))))
+                self.checkpoint = Checkpoint(self.checkpoint_file, checkpoint_options, resume,
+                                             self.checkpoint_interval)
+                if self.checkpoint.resume_row is not None:
+                    tqdm.write(f'Resuming from the checkpoint at row {self.checkpoint.resume_row}...')
+                    self._restore_checkpoint()
+                    rows = self._skip_checkpoint_rows(rows)
+                elif resume:
+                    tqdm.write('No checkpoint of an unfinished run with the same input, dictionary and options. '
+                               'Spell checking from the start.')
+            check_kwargs = {'num_context_words': num_context_words,
+                            'auto': auto,
+                            'suggest': suggest,
+                            'debug': debug,
+                            'google_sc': google_sc,
+                            'spacy_batch_size': spacy_batch_size,
+                            'cascade': cascade}
+            if workers > 1:
+                self._check_rows_parallel(rows, chunk_size, workers, **check_kwargs)
+            elif pipeline:
+                self._check_rows_pipeline(rows, chunk_size, queue_size, correct_workers, **check_kwargs)
+            else:
+                self._check_rows(tqdm(rows), chunk_size, **check_kwargs)
+
+            secs_taken = time.time() - start_time
+            f_time = format_time(secs=secs_taken)
+            print(f'\nText spellchecked in {f_time}\n')
+            print(f'Checked {self.count["words-checked"]} words.')
+            print(f'Found {self.count["words-misspelled"]} misspelt words.')
+            print(f'Corrected {self.count["words-corrected"]} words.')
+            print(f'Unable to correct {self.count["words-not-corrected"]} words.')
+            print(
+                f'Google corrected {self.count["google-words-corrected"]} words.')
+            print(
+                f'Google could not correct {self.count["google-words-not-corrected"]} words.')
+            print(f'Token cache: {self.count["token-cache-hits"]} hits, '
+                  f'{self.count["token-cache-misses"]} misses.')
+            print('Lexicon lookups: ' + ', '.join(
+                f'{key[len("lexicon-"):]} {value}' for key, value in sorted(self.count.items())
+                if key.startswith('lexicon-')))
+            if auto and corpus_stats:
+                print(f'Corpus frequencies corrected {self.count["corpus-words-corrected"]} words.')
+            if auto and cascade:
+                print(f'Edit distance corrected {self.count["edit-distance-words-corrected"]} words.')
+            if auto:
+                print('Correction tiers:')
+                for tier in TIERS:
+                    if self.count[f'tier-{tier}-checked']:
+                        print(f'  {tier}: {self.count[f"tier-{tier}-checked"]} checked, '
+                              f'{self.count[f"tier-{tier}-resolved"]} resolved '
+                              f'in {self.count[f"tier-{tier}-seconds"]:.2f}s')
+            if auto:
+                print(f'Spacy cache: {self.count["spacy-cache-hits"]} hits, '
+                      f'{self.count["spacy-cache-misses"]} misses.')
+
+            if incremental:
+                print(f'Reused findings for {self.count["rows-unchanged"]} unchanged rows.')
+            if dedupe:
+                print(f'Reused findings for {self.count["rows-duplicate"]} duplicate rows.')
+            if self.count['rows-checkpointed']:
+                print(f'Resumed findings for {self.count["rows-checkpointed"]} rows from the checkpoint.')
+
+            print('\nSaving results file...')
+            # Calls of the write stage count the findings written
+            with self.profiler.stage(STAGE_WRITE, calls=0):
+                self.result_writer.save()
+            if incremental:
+                self.manifest.save()
+                self.manifest = None
+            if self.checkpoint:
+                # The run has finished, so there is nothing to resume
+                self.checkpoint.remove()
+                self.checkpoint = None
+            if debug:
+                self._output_debug()
+            print('Results saved!')
+        finally:
+            self._end_run()
+
+        if profile:
+            self.profile = self.profiler.save(self.profile_file, counts=dict(self.count))
+            self.profiler.enabled = False
+            print('\nProfile:')
+            print(format_report(self.profile))
+            print(f'Profile saved to "{self.profile_file}"')
+            return self.profile
+
+    def _end_run(self):
+        '''
+        Closes the stores of a spell check run and resets its state. A run which did not finish
+        keeps its previous manifest and its checkpoint, so it can be resumed.
+        '''
+        if self.manifest is not None:
+            self.manifest.close()
+        if self.checkpoint is not None:
+            self.checkpoint.close()
+        if self.row_findings is not None:
+            self.row_findings.close()
+        if self.result_writer is not None:
+            self.result_writer.close()
+        self.result_writer = None
+        self.manifest = None
+        self.manifest_row_hashes = {}
+        self.checkpoint = None
+        self.row_findings = None
+        self.duplicate_rows = {}
+        self.pending_google_corrections = deque()
+
+    def check_batch(self, texts, **check_kwargs):
+        '''
+        Spell checks an iterable of strings in memory, without reading or writing any files,
+        and yields a Finding for each misspelt word. The row of each finding is the position
+        of its text in the iterable, starting from 0. Takes the same keyword arguments as check_stream.
+        '''
+        return self.check_stream(enumerate(texts), **check_kwargs)
+
+    def check_stream(self, rows, num_context_words=5, auto=True, suggest=True, google_sc=False,
+                     chunk_size=256, spacy_batch_size=32, suggestion_engine=None, cascade=True):
+        '''
+        Spell checks an iterable of (key, text) tuples in memory, without reading or writing
+        any files, and yields a Finding for each misspelt word, with the text's key as its row.
+        Findings are yielded lazily as each chunk of chunk_size texts is corrected, and have a
+        correction if one was found. The dictionaries, caches and spacy pipeline are loaded once
+        and shared across calls, so a long running process can check many batches of text.
+        Google searches are disabled by default as they block each chunk until they finish.
+        '''
+        self._prepare_check(suggest, suggestion_engine)
+        check_kwargs = {'num_context_words': num_context_words,
+                        'auto': auto,
+                        'suggest': suggest,
+                        'google_sc': google_sc,
+                        'spacy_batch_size': spacy_batch_size,
+                        'cascade': cascade}
+
+        findings = deque()
+        self.finding_sink = findings
+        try:
+            for chunk in chunked(rows, chunk_size):
+                self._check_rows(chunk, chunk_size, **check_kwargs)
+                while findings:
+                    yield findings.popleft()
+        finally:
+            self.finding_sink = None
+
+    def _prepare_check(self, suggest=True, suggestion_engine=None):
+        ''' Loads the word dictionary, lexicon and, if suggest is True, the suggester '''
+        if suggestion_engine and suggestion_engine != self.suggestion_engine:
+            self.suggestion_engine = suggestion_engine
+            self.suggester = None
+            # Cached suggestions came from the previous engine
+            self.token_cache.clear()
+
+        with self.profiler.stage(STAGE_LOAD_DICTIONARY):
+            if not self.word_dict:
+                self._load_word_dict()
+            if self.lexicon is None:
+                self._build_lexicon()
+        if self.suggester is None and suggest:
+            self._build_suggester()
+
+    def _check_rows(self, rows, chunk_size=256, num_context_words=5, auto=True, suggest=True,
+                    debug=False, google_sc=True, spacy_batch_size=32, cascade=True):
+        ''' Spell checks an iterable of (row number, text) tuples '''
+        pending = []  # Misspellings in the current chunk of rows awaiting correction
+        for n, (row, value) in enumerate(rows, start=1):
+            if value:
+                text = str(value)
+                for misspelling in self._check_text(text, row, num_context_words, suggest, debug):
+                    pending.append((text, misspelling))
+
+            # Correct misspellings a chunk of rows at a time so that
+            # contextual checks can be batched through the spacy pipeline
+            if n % chunk_size == 0:
+                self._correct_misspellings(pending, auto, suggest, google_sc, spacy_batch_size, cascade)
+                self._store_google_corrections()
+                self._commit_stores()
+                self._save_checkpoint(row)
+                pending = []
+        self._correct_misspellings(pending, auto, suggest, google_sc, spacy_batch_size, cascade)
+        self._store_google_corrections(wait=True)
+        self._commit_stores()
+
+    def _commit_stores(self):
+        ''' Commits writes to the correction store and manifest '''
+        if self._correction_store:
+            self._correction_store.commit()
+        if self.manifest:
+            self.manifest.commit()
+
+    def _save_checkpoint(self, row):
+        '''
+        Saves a checkpoint of the run up to and including the row, if the checkpoint
+        interval has passed since the last one. Waits for queued google searches first,
+        so all findings of the rows up to the checkpoint are stored.
+        '''
+        if self.checkpoint is None or not self.checkpoint.due():
+            return
+        self._store_google_corrections(wait=True)
+        self._commit_stores()
+        # Spacy cache keys are (text hash, word) tuples
+        caches = {'token': ((w, list(verdict)) for w, verdict in self.token_cache.items()),
+                  'spacy': (('|'.join(key), passes) for key, passes in self.spacy_cache.items())}
+        self.checkpoint.save(row, dict(self.count), caches)
+
+    def _restore_checkpoint(self):
+        ''' Restores the counters and caches saved in the checkpoint being resumed '''
+        for key, value in self.checkpoint.counts.items():
+            if key not in ROW_FILTER_COUNTS:
+                self.count[key] += value
+        for w, (verdict, suggestions) in self.checkpoint.get_cache('token'):
+            self.token_cache[w] = (verdict, tuple(suggestions) if suggestions is not None else None)
+        for key, passes in self.checkpoint.get_cache('spacy'):
+            self.spacy_cache[tuple(key.split('|', 1))] = passes
+
+    def _skip_checkpoint_rows(self, rows):
+        '''
+        Yields the (row number, text) tuples after the checkpoint being resumed,
+        storing the findings saved in the checkpoint for the rows up to it
+        '''
+        last_row = self.checkpoint.resume_row
+        for row, value in rows:
+            if row > last_row:
+                yield row, value
+                continue
+            for corrected, finding in self.checkpoint.get_findings(row):
+                self._store_finding(finding, corrected)
+            self.count['rows-checkpointed'] += 1
+
+    def _skip_unchanged_rows(self, rows):
+        '''
+        Yields the (row number, text) tuples whose text has changed since the last run,
+        storing the findings from the last run for unchanged rows
+        '''
+        for row, value in rows:
+            if not value:
+                yield row, value
+                continue
+
+            text = str(value)
+            h = text_hash(text)
+            prev = self.manifest.get_prev(h)
+            if prev is None:
+                # Record findings for the first row with this text in the new manifest
+                if self.manifest.add_text(h, self._get_custom_words(text)):
+                    self.manifest_row_hashes[row] = h
+                self.count['rows-changed'] += 1
+                yield row, value
+                continue
+
+            custom_words, findings = prev
+            if self.manifest.add_text(h, custom_words):
+                for corrected, finding in findings:
+                    self.manifest.add_finding(h, corrected, finding)
+            for corrected, finding in findings:
+                finding.row = row
+                self._store_finding(finding, corrected, copy=True)
+            self.count['rows-unchanged'] += 1
+
+    def _skip_duplicate_rows(self, rows):
+        '''
+        Yields the (row number, text) tuples for the first row with each text, ignoring
+        whitespace differences. Findings for the first row are copied to each duplicate row.
+        '''
+        first_rows = {}  # Normalized text hash to first row number and exact text hash
+        for row, value in rows:
+            if not value:
+                yield row, value
                 continue
 
-            text = str(cell.value)
+            text = str(value)
+            h = hashlib.md5(' '.join(text.split()).encode('utf-8')).digest()
+            first = first_rows.get(h)
+            if first is None:
+                first_rows[h] = (row, hashlib.md5(text.encode('utf-8')).digest())
+                yield row, value
+                continue
 
-            words = text.split()
-            for i, w in enumerate(words):
+            # Copy findings already stored for the first row, and any stored later.
+            # Character spans only apply to text which is exactly the same
+            first_row, first_exact_hash = first
+            exact = hashlib.md5(text.encode('utf-8')).digest() == first_exact_hash
+            self.count['rows-duplicate'] += 1
+            with self.duplicate_rows_lock:
+                self.duplicate_rows.setdefault(first_row, []).append((row, exact))
+                findings = self.row_findings.get(first_row)
+            for corrected, finding in findings:
+                self._store_finding(finding.copy(row, exact), corrected, copy=True)
+
+    def _get_custom_words(self, text):
+        ''' Returns the set of custom dictionary words in the text '''
+        words = set()
+        for i, raw, w, skip in tokenize(text):
+            if not skip and w.lower() in self.word_dict:
+                words.add(w.lower())
+        return words
+
+    def _check_rows_pipeline(self, rows, chunk_size=256, queue_size=8, correct_workers=1, num_context_words=5,
+                             auto=True, suggest=True, debug=False, google_sc=True, spacy_batch_size=32,
+                             cascade=True):
+        '''
+        Spell checks an iterable of (row number, text) tuples in a pipeline of stages running in
+        their own threads: reading rows, checking words against the dictionaries, correcting
+        misspellings and writing findings. The stages are connected by queues of up to queue_size
+        chunks of rows, so the dictionary checks carry on while corrections wait on the spacy
+        pipeline and google, without reading arbitrarily far ahead.
+        With correct_workers > 1, misspellings are corrected in a pool of worker processes,
+        each with its own spacy pipeline.
+        '''
+        pipeline = Pipeline()
+        row_chunks = pipeline.queue('read', queue_size)
+        pending_chunks = pipeline.queue('verify', queue_size)
+        findings = pipeline.queue('write', queue_size * chunk_size)
+        correct_kwargs = {'auto': auto,
+                          'suggest': suggest,
+                          'google_sc': google_sc,
+                          'spacy_batch_size': spacy_batch_size,
+                          'cascade': cascade}
+        counts_lock = threading.Lock()
+        pbar = tqdm(unit='row')
+
+        def counted(stage):
+            # Each stage adds to counters of its own thread, merged into the run's when it finishes
+            def run_stage():
+                self._stage_counts.count = count = defaultdict(int)
                 try:
-                    # Remove punctuation
-                    if w[-1] in [',', '.', ';', ':', '/', '-', '!', '?', '%']:
-                        w = w[:-1]
-                    # Remove brackets
-                    if w[0] in ['(', '[', '{']:
-                        w = w[1:]
-                    if w[-1] in [')', ']', '}']:
-                        w = w[:-1]
-
-                except IndexError:
-                    continue
+                    stage()
+                finally:
+                    del self._stage_counts.count
+                    with counts_lock:
+                        for key, value in count.items():
+                            self._count[key] += value
+            return run_stage
+
+        def read():
+            # Skipping unchanged and duplicate rows also happens in this stage
+            for chunk in chunked(rows, chunk_size):
+                row_chunks.put(chunk)
+
+        def check_words():
+            for chunk in row_chunks:
+                pending = []
+                for row, value in chunk:
+                    if value:
+                        text = str(value)
+                        for misspelling in self._check_text(text, row, num_context_words, suggest, debug):
+                            pending.append((text, misspelling))
+                pending_chunks.put(pending)
+                pbar.set_postfix(pipeline.queue_depths(), refresh=False)
+                pbar.update(len(chunk))
+
+        def correct():
+            for pending in pending_chunks:
+                self._correct_misspellings(pending, **correct_kwargs)
+                self._store_google_corrections()
+                self._commit_stores()
+            self._store_google_corrections(wait=True)
+            self._commit_stores()
+
+        def correct_parallel():
+            # Up to 2 chunks per worker are submitted ahead of the results merged, in the order submitted
+            submitted = deque()
+            for pending in pending_chunks:
+                submitted.append(pool.apply_async(_correct_misspellings_worker, ((pending, correct_kwargs),)))
+                if len(submitted) >= 2 * correct_workers:
+                    self._merge_worker_result(submitted.popleft().get())
+                    self._commit_stores()
+            while submitted:
+                self._merge_worker_result(submitted.popleft().get())
+            self._store_google_corrections(wait=True)
+            self._commit_stores()
+
+        def write():
+            for misspelling, corrected, copy in findings:
+                self._write_finding(misspelling, corrected, copy)
+
+        # Rows are all read and checked before the last corrections are made, so the
+        # correction stage closes the findings queue once both have finished storing findings
+        pipeline.add_stage('read', counted(read), outputs=[row_chunks])
+        pipeline.add_stage('check-words', counted(check_words), outputs=[pending_chunks])
+        pipeline.add_stage('correct', counted(correct_parallel if correct_workers > 1 else correct),
+                           outputs=[findings])
+        pipeline.add_stage('write', counted(write))
+
+        # Worker processes are started before the stage threads, as forking
+        # while other threads hold locks could leave the locks held in the workers
+        pool = self._start_worker_pool(correct_workers) if correct_workers > 1 else None
+        self.finding_queue = findings
+        try:
+            pipeline.run()
+        finally:
+            self.finding_queue = None
+            pbar.close()
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def _start_worker_pool(self, workers):
+        ''' Returns a pool of worker processes with this SpellChecker's dictionaries and settings '''
+        tqdm.write(f'Starting {workers} worker processes...')
+        settings = {name: getattr(self, name) for name in WORKER_SETTINGS}
+        return multiprocessing.Pool(workers, initializer=_init_worker,
+                                    initargs=(self.init_kwargs, self.word_dict, settings,
+                                              self.corpus_stats, self.profiler.enabled))
+
+    def _check_rows_parallel(self, rows, chunk_size, workers, **check_kwargs):
+        '''
+        Spell checks an iterable of (row number, text) tuples in chunks across a pool
+        of worker processes, merging results into this SpellChecker in row order
+        '''
+        pool = self._start_worker_pool(workers)
+
+        def merge(result):
+            self._merge_worker_result(result)
+            self._save_checkpoint(result['last_row'])
+            pbar.update(result['rows'])
+
+        try:
+            # Rows are read in this thread, as skipping unchanged, duplicate and checkpointed rows
+            # stores findings, with up to 2 chunks per worker submitted ahead of the results merged
+            submitted = deque()
+            with tqdm(unit='row') as pbar:
+                for chunk in chunked(rows, chunk_size):
+                    submitted.append(pool.apply_async(_check_rows_worker, ((chunk, chunk_size, check_kwargs),)))
+                    if len(submitted) >= 2 * workers:
+                        merge(submitted.popleft().get())
+                # Results are merged in the order the chunks were submitted
+                while submitted:
+                    merge(submitted.popleft().get())
+                self._store_google_corrections(wait=True)
+                self._commit_stores()
+        finally:
+            pool.close()
+            pool.join()
+
+    def _merge_worker_result(self, result):
+        ''' Merges results returned by a worker process into this SpellChecker '''
+        for misspelling in result['corrected_words']:
+            self._store_finding(misspelling, corrected=True)
+        for misspelling in result['not_corrected_words']:
+            self._store_finding(misspelling, corrected=False)
+        for key, value in result['count'].items():
+            self.count[key] += value
+        # Google searches for the chunk run in the background while later chunks are merged
+        for misspelling in result['google_misspellings']:
+            self._queue_google_correction(misspelling)
+        self._store_google_corrections()
+        if result['profile'] is not None:
+            self.profiler.merge(result['profile'])
+        if result['words'] is not None:
+            self.words.extend(result['words'])
+
+    def _check_text(self, text, row, num_context_words=5, suggest=True, debug=False):
+        '''
+        Checks each word of the text against the dictionaries and returns
+        a list of Findings for the words not found
+        '''
+        misspellings = []
 
-                # Track words checked
-                self.count['words-checked'] += 1
-                if debug:
-                    self.words.append(w)
+        with self.profiler.stage(STAGE_TOKENIZE):
+            tokens = tokenize(text)
+        spans = None  # Character spans of the tokens, only needed for misspelt words
+        for i, raw, w, skip in tokens:
+            if skip == SKIP_PUNCTUATION:
+                continue
 
-                # Ignore words with numbers
-                if re.search('[0-9]+', w):
-                    continue
-                # Ignore short, all caps words (Likely tickers)
-                if len(w) <= 5 and (w == w.upper()):
-                    continue
-                # Ignore capiltalized words (Names)
-                if w == w.capitalize():
-                    continue
+            # Track words checked
+            self.count['words-checked'] += 1
+            if debug:
+                self.words.append(w)
 
-                if not w:
-                    continue
+            if skip:
+                continue
 
-                word = w.lower()
+            verdict, suggestions = self._get_token_verdict(w, suggest=suggest)
+            if verdict != TOKEN_MISSPELLED:
+                continue
 
-                # Check dictionaries
-                if word in self.word_dict:
-                    continue
-                if (word in english_words_lower_alpha_set or
-                        word in english_words_lower_set):
-                    continue
-                if self.enchant_dict_US.check(word):
-                    continue
-                if self.enchant_dict_GB.check(word):
-                    continue
+            self.count['words-misspelled'] += 1
+
+            # Get sentence context for word
+            first_context_index = max(0, i-num_context_words)
+            last_context_index = min(i+num_context_words+1, len(tokens))
+            context_words = [
+                token[1] for token in tokens[first_context_index: last_context_index]]
+
+            if first_context_index > 0:
+                context_words.insert(0, '...')
+            if last_context_index < len(tokens):
+                context_words.append('...')
+
+            context = " ".join(context_words)
 
-                self.count['words-misspelled'] += 1
-
-                # Get sentence context for word
-                first_context_index = max(0, i-num_context_words)
-                last_context_index = min(i+num_context_words+1, len(words))
-                context_words = [
-                    w for w in words[first_context_index: last_context_index]]
-
-                if first_context_index > 0:
-                    context_words.insert(0, '...')
-                if last_context_index < len(words):
-                    context_words.append('...')
-
-                context = " ".join(context_words)
-
-                google_search_context_url = 'http://www.google.com/search?q=' + \
-                    urllib.parse.quote_plus(context)
-                google_search_word_url = 'http://www.google.com/search?q=' + \
-                    urllib.parse.quote_plus(w)
-
-                # Get word suggestions from enchant for misspelt word
-                suggestions = []
-                if suggest:
-                    suggestions = self.enchant_dict_US.suggest(word)
-                    # Use up to 3 suggestions
-                    suggestions = suggestions[:min(3, len(suggestions))]
-
-                if auto:
-                    # Context spell check for suggested words
-                    for suggestion in suggestions:
-                        new_text = text.replace(w, suggestion)
-                        res = self._spacy_spellcheck(suggestion, new_text)
-                        # If suggested word is not flagged as misspelt
-                        if res:
-                            # Print correction to terminal
-                            _f_new_context = self._get_f_new_context(
-                                context, w, suggestion)
-                            tqdm.write(_f_new_context)
-                            # Store correction data for outputting
-                            self.corrected_words.append({'word': w,
-                                                         'correction': suggestion,
-                                                         'row': cell.row,
-                                                         'context': context,
-                                                         'suggestions': suggestions,
-                                                         'search_context_url': google_search_context_url,
-                                                         'search_word_url': google_search_word_url})
-                            self.count['words-corrected'] += 1
-                            break
-                    else:
-                        if google_sc and suggest:
-                            # Get google searches suggested word correction
-                            _google_output = self._get_google_correction(google_search_context_url, word=w)
-                            if _google_output:
-                                google_suggested_words = _google_output
-                            else:
-                                google_suggested_words = []
-                            # google_suggested_words = _ if (
-                            #     _ := self._get_google_correction(google_search_context_url, word=w)) else []
-
-                            if len(google_suggested_words) > 1:
-                                try:
-                                    google_suggested_word = difflib.get_close_matches(
-                                        w, google_suggested_words, cutoff=0.4)[0]
-                                except IndexError:
-                                    continue
-                            elif len(google_suggested_words) == 1:
-                                google_suggested_word = google_suggested_words[0]
-
-                            else:
-                                self.not_corrected_words.append({'word': w,
-                                                                 'row': cell.row,
-                                                                 'context': context,
-                                                                 'suggestions': suggestions,
-                                                                 'search_context_url': google_search_context_url,
-                                                                 'search_word_url': google_search_word_url})
-                                self.count['google-words-not-corrected'] += 1
-                                continue
-
-                            _f_new_context = self._get_f_new_context(
-                                context, w, google_suggested_word)
-                            tqdm.write('Google Correction:' + _f_new_context)
-                            self.corrected_words.append({'word': w,
-                                                         'correction': google_suggested_word,
-                                                         'row': cell.row,
-                                                         'context': context,
-                                                         'suggestions': suggestions,
-                                                         'search_context_url': google_search_context_url,
-                                                         'search_word_url': google_search_word_url})
-                            self.count['google-words-corrected'] += 1
-                            continue
-
-                        self.not_corrected_words.append({'word': w,
-                                                         'row': cell.row,
-                                                         'context': context,
-                                                         'suggestions': suggestions,
-                                                         'search_context_url': google_search_context_url,
-                                                         'search_word_url': google_search_word_url})
-                        self.count['words-not-corrected'] += 1
+            # Get character spans of word in the text and the context
+            if spans is None:
+                spans = get_token_spans(text)
+            word_start, word_end = get_token_word_span(raw)
+            start = spans[i][0] + word_start
+            context_index = i - first_context_index + (1 if first_context_index > 0 else 0)
+            context_start = sum(len(c) + 1 for c in context_words[:context_index]) + word_start
+
+            misspellings.append(Finding(w, row, context, suggestions or (),
+                                        index=i, start=start, end=start + len(w),
+                                        context_start=context_start))
+        return misspellings
+
+    def _correct_misspellings(self, pending, auto=True, suggest=True, google_sc=True, spacy_batch_size=32,
+                              cascade=True):
+        '''
+        Corrects a list of (text, misspelling) tuples and stores each misspelling
+        in either the corrected or not corrected words.
+        Misspellings pass through tiers of correction checks, cheapest first. Each tier
+        stores the misspellings it can resolve and passes the rest on to the next tier, so the
+        spacy pipeline only checks ambiguous misspellings and google only searches for the
+        misspellings left over. With cascade=False the cheap edit distance tier is skipped.
+        '''
+        if not auto:
+            for text, misspelling in pending:
+                self._store_finding(misspelling, corrected=False)
+            return
+
+        tiers = []
+        if self.correction_store:
+            tiers.append((TIER_STORE, self._resolve_stored))
+        if self.corpus_stats:
+            tiers.append((TIER_CORPUS, self._resolve_corpus))
+        if cascade:
+            tiers.append((TIER_EDIT_DISTANCE, self._resolve_edit_distance))
+        # Without the spacy pipeline, misspellings left by the cheaper tiers go straight to google
+        if self.use_spacy:
+            tiers.append((TIER_SPACY, lambda pending: self._resolve_spacy(pending, spacy_batch_size)))
+
+        for tier, resolve in tiers:
+            if not pending:
+                return
+            start_time = time.perf_counter()
+            checked = len(pending)
+            pending = resolve(pending)
+            self._count_tier(tier, checked, checked - len(pending), start_time)
+
+        for text, misspelling in pending:
+            if google_sc and suggest:
+                if self.google_misspellings is not None:
+                    self.google_misspellings.append(misspelling)
                 else:
-                    self.not_corrected_words.append({'word': w,
-                                                     'row': cell.row,
-                                                     'context': context,
-                                                     'suggestions': suggestions,
-                                                     'search_context_url': google_search_context_url,
-                                                     'search_word_url': google_search_word_url})
-
-        secs_taken = time.time() - start_time
-        f_time = format_time(secs=secs_taken)
-        print(f'\nText spellchecked in {f_time}\n')
-        print(f'Checked {self.count["words-checked"]} words.')
-        print(f'Found {self.count["words-misspelled"]} misspelt words.')
-        print(f'Corrected {self.count["words-corrected"]} words.')
-        print(f'Unable to correct {self.count["words-not-corrected"]} words.')
-        print(
-            f'Google corrected {self.count["google-words-corrected"]} words.')
-        print(
-            f'Google could not correct {self.count["google-words-not-corrected"]} words.')
+                    self._queue_google_correction(misspelling)
+                continue
 
-        print('\nSaving results file...')
-        self._output_spacy()
-        if debug:
-            self._output_debug()
-        print('Results saved!')
+            self._store_finding(misspelling, corrected=False)
+            self.count['words-not-corrected'] += 1
 
-    def _spacy_spellcheck(self, word, text):
-        ''' Returns True if input word passes Spacy spellcheck, else False '''
-        doc = self.nlp(text)
-        # check if corrected word is still marked as mistake
-        if doc._.performed_spellCheck:
-            misspelt_spacy = [w.text for w,
-                              s in doc._.score_spellCheck.items()]
-            if word in misspelt_spacy:
-                return False
-        return True
+    def _queue_google_correction(self, misspelling):
+        '''
+        Queues a google search for the misspelling's correction, or uses the stored result
+        of a previous search, and carries on spell checking while it is fetched
+        '''
+        store = self.correction_store
+        google_output = store.get(KIND_GOOGLE, correction_key(misspelling)) if store else None
+        if google_output is not None:
+            future = Future()
+            future.set_result(google_output)
+        else:
+            future = self.correction_fetcher.submit(
+                misspelling.search_context_url(self.search_url), word=misspelling.word)
+        self.pending_google_corrections.append((misspelling, future, google_output is not None))
+        self.count[f'tier-{TIER_GOOGLE}-checked'] += 1
+
+    def _count_tier(self, tier, checked, resolved, start_time):
+        ''' Adds to the counters and time taken of a correction tier '''
+        self.count[f'tier-{tier}-checked'] += checked
+        self.count[f'tier-{tier}-resolved'] += resolved
+        self.count[f'tier-{tier}-seconds'] += time.perf_counter() - start_time
+
+    def _resolve_stored(self, pending):
+        ''' Uses corrections chosen for the same word and context in previous runs '''
+        unresolved = []
+        for text, misspelling in pending:
+            stored = self.correction_store.get(KIND_CORRECTION, correction_key(misspelling))
+            if stored is None:
+                unresolved.append((text, misspelling))
+            else:
+                self._store_stored_correction(misspelling, stored)
+        return unresolved
+
+    def _resolve_corpus(self, pending):
+        ''' Corrects misspellings with an obvious correction in the input text's word frequencies '''
+        unresolved = []
+        for text, misspelling in pending:
+            correction = self.corpus_stats.get_correction(misspelling.word.lower(), misspelling.suggestions)
+            if correction is None:
+                unresolved.append((text, misspelling))
+                continue
+            self._store_correction(misspelling, correction, 'Corpus Correction:')
+            self.count['corpus-words-corrected'] += 1
+        return unresolved
+
+    def _resolve_edit_distance(self, pending):
+        '''
+        Corrects misspellings with a single, close suggestion,
+        or with only one suggestion much closer than the others
+        '''
+        unresolved = []
+        for text, misspelling in pending:
+            correction = self._get_edit_distance_correction(misspelling)
+            if correction is None:
+                unresolved.append((text, misspelling))
+                continue
+            self._store_correction(misspelling, correction, 'Edit Distance Correction:')
+            self.count['edit-distance-words-corrected'] += 1
+        return unresolved
+
+    def _get_edit_distance_correction(self, misspelling):
+        ''' Returns the suggestion which is clearly closest to the misspelt word, else None '''
+        word = misspelling.word.lower()
+        suggestions = misspelling.suggestions
+        if len(suggestions) == 1:
+            if edit_distance(word, suggestions[0].lower(), self.single_suggestion_max_distance) is not None:
+                return suggestions[0]
+            return None
+
+        closest = [suggestion for suggestion in suggestions
+                   if edit_distance(word, suggestion.lower(), self.closest_suggestion_max_distance) is not None]
+        return closest[0] if len(closest) == 1 else None
+
+    def _resolve_spacy(self, pending, spacy_batch_size=32):
+        '''
+        Context spell check for suggested words. Each round checks the next
+        suggestion of every misspelling not yet corrected in a single batch
+        '''
+        corrections = [None] * len(pending)
+        unresolved = [i for i, (text, m) in enumerate(pending) if m.suggestions]
+        round_idx = 0
+        while unresolved:
+            candidates = []
+            for i in unresolved:
+                text, misspelling = pending[i]
+                suggestion = misspelling.suggestions[round_idx]
+                new_text = text[:misspelling.start] + suggestion + text[misspelling.end:]
+                candidates.append((suggestion, new_text))
+
+            results = self._spacy_spellcheck_batch(candidates, batch_size=spacy_batch_size)
+
+            next_unresolved = []
+            for i, (suggestion, new_text), res in zip(unresolved, candidates, results):
+                # If suggested word is not flagged as misspelt
+                if res:
+                    corrections[i] = suggestion
+                elif round_idx + 1 < len(pending[i][1].suggestions):
+                    next_unresolved.append(i)
+            unresolved = next_unresolved
+            round_idx += 1
+
+        store = self.correction_store
+        not_corrected = []
+        for (text, misspelling), correction in zip(pending, corrections):
+            if not correction:
+                not_corrected.append((text, misspelling))
+                continue
+            self._store_correction(misspelling, correction)
+            if store:
+                store.set(KIND_CORRECTION, correction_key(misspelling),
+                          {'correction': correction, 'source': 'spacy'})
+        return not_corrected
+
+    def _store_correction(self, misspelling, correction, label=''):
+        ''' Prints the correction to the terminal and stores the corrected misspelling '''
+        tqdm.write(label + self._get_f_new_context(
+            misspelling.context, misspelling.word, correction, misspelling.context_start))
+        misspelling.correction = correction
+        self._store_finding(misspelling, corrected=True)
+        self.count['words-corrected'] += 1
+
+    def _store_google_corrections(self, wait=False):
+        '''
+        Stores misspellings whose google search has finished, in the order they were queued.
+        If wait is True, waits for all queued google searches to finish.
+        '''
+        store = self.correction_store
+        while self.pending_google_corrections:
+            misspelling, future, cached = self.pending_google_corrections[0]
+            if not wait and not future.done():
+                return
+            self.pending_google_corrections.popleft()
+            # Google searches run in the background, so only time spent waiting on them is counted
+            start_time = time.perf_counter()
+            with self.profiler.stage(STAGE_GOOGLE):
+                google_suggested_words = future.result()
+            self.count[f'tier-{TIER_GOOGLE}-seconds'] += time.perf_counter() - start_time
+            # Store successful google searches for future runs
+            if store and not cached and google_suggested_words is not None:
+                store.set(KIND_GOOGLE, correction_key(misspelling), google_suggested_words)
+            self._store_google_correction(misspelling, google_suggested_words)
+
+    def _store_google_correction(self, misspelling, google_suggested_words):
+        ''' Stores a misspelling using the suggested words from its google search '''
+        w = misspelling.word
+        if google_suggested_words == [] and self.correction_store:
+            # Google found no correction for the word in this context
+            self.correction_store.set(KIND_CORRECTION, correction_key(misspelling),
+                                      {'correction': None, 'source': 'google'})
+        google_suggested_words = google_suggested_words or []
+
+        if len(google_suggested_words) > 1:
+            matches = difflib.get_close_matches(
+                w, google_suggested_words, n=len(google_suggested_words), cutoff=0.4)
+            if not matches:
+                return
+            if self.corpus_stats:
+                matches = self.corpus_stats.rank(w.lower(), matches)
+            google_suggested_word = matches[0]
+        elif len(google_suggested_words) == 1:
+            google_suggested_word = google_suggested_words[0]
 
-    def _get_column_with_title(self, worksheet, text, exact_match=False, col_letter=False):
-        # Check cells in row 1 for matching text
-        for j in range(1, worksheet.max_column+1):
-            cell = worksheet.cell(1, j)
-            cell_text = str(cell.value)
+        else:
+            self._store_finding(misspelling, corrected=False)
+            self.count['google-words-not-corrected'] += 1
+            return
 
-            if exact_match:
-                if cell_text == text:
-                    return get_column_letter(j) if col_letter else j
+        _f_new_context = self._get_f_new_context(
+            misspelling.context, w, google_suggested_word, misspelling.context_start)
+        tqdm.write('Google Correction:' + _f_new_context)
+        misspelling.correction = google_suggested_word
+        self._store_finding(misspelling, corrected=True)
+        self.count['google-words-corrected'] += 1
+        self.count[f'tier-{TIER_GOOGLE}-resolved'] += 1
+        if self.correction_store:
+            self.correction_store.set(KIND_CORRECTION, correction_key(misspelling),
+                                      {'correction': google_suggested_word, 'source': 'google'})
+
+    def _store_stored_correction(self, misspelling, stored):
+        ''' Stores a misspelling using the correction chosen for it in a previous run '''
+        self.count['correction-store-hits'] += 1
+        if stored['correction']:
+            _f_new_context = self._get_f_new_context(
+                misspelling.context, misspelling.word, stored['correction'], misspelling.context_start)
+            tqdm.write('Stored Correction:' + _f_new_context)
+            misspelling.correction = stored['correction']
+            self._store_finding(misspelling, corrected=True)
+            if stored['source'] == 'google':
+                self.count['google-words-corrected'] += 1
             else:
-                if cell_text.strip().lower() == text.strip().lower():
-                    return get_column_letter(j) if col_letter else j
+                self.count['words-corrected'] += 1
+        else:
+            self._store_finding(misspelling, corrected=False)
+            self.count['google-words-not-corrected'] += 1
+
+    def _store_finding(self, misspelling, corrected, copy=False):
+        '''
+        Writes the misspelling to the open result writer, else stores it in memory.
+        copy is True for findings copied from another row.
+        '''
+        if self.finding_queue is not None:
+            # Findings are written by the writer stage of the pipeline
+            self.finding_queue.put((misspelling, corrected, copy))
+        else:
+            self._write_finding(misspelling, corrected, copy)
+
+    def _write_finding(self, misspelling, corrected, copy=False):
+        # Copied findings are copied again when a run is resumed
+        if self.checkpoint and not copy:
+            self.checkpoint.add_finding(corrected, misspelling)
+        if self.manifest:
+            h = self.manifest_row_hashes.get(misspelling.row)
+            if h:
+                self.manifest.add_finding(h, corrected, misspelling)
+        if self.finding_sink is not None:
+            self.finding_sink.append(misspelling)
+        elif self.result_writer:
+            with self.profiler.stage(STAGE_WRITE):
+                if corrected:
+                    self.result_writer.write_corrected(misspelling)
+                else:
+                    self.result_writer.write_not_corrected(misspelling)
+        elif corrected:
+            self.corrected_words.append(misspelling)
+        else:
+            self.not_corrected_words.append(misspelling)
 
-        return False
+        # Copy findings to rows with duplicate text
+        if self.row_findings is not None and not copy:
+            with self.duplicate_rows_lock:
+                self.row_findings.add(misspelling.row, corrected, misspelling)
+                duplicate_rows = list(self.duplicate_rows.get(misspelling.row, []))
+            for row, exact in duplicate_rows:
+                self._write_finding(misspelling.copy(row, exact), corrected, copy=True)
 
-    def _get_google_correction(self, url, word=None):
-        ''' Returns the corrected word from google search "Did you mean: ..." '''
-        tqdm.write(f'Googling word "{word}"...')
-        time.sleep(3)  # Prevent spam/I.P. block
-        r = self.session.get(url, headers=headers)
-        soup = BeautifulSoup(r.text, 'html.parser')
+    def _get_token_verdict(self, w, suggest=True):
+        '''
+        Returns a (verdict, suggestions) tuple for a stripped token, where verdict is
+        one of TOKEN_SKIPPED, TOKEN_KNOWN or TOKEN_MISSPELLED. Verdicts are cached so
+        repeated tokens skip the regex, dictionary and enchant lookups.
+        Suggestions are None if they have not been fetched.
+        '''
+        cached = self.token_cache.get(w)
+        if cached is not None:
+            verdict, suggestions = cached
+            # Misspellings cached without suggestions still need them fetched
+            if not (suggest and verdict == TOKEN_MISSPELLED and suggestions is None):
+                self.count['token-cache-hits'] += 1
+                return cached
+        self.count['token-cache-misses'] += 1
+
+        verdict = self._check_token(w)
+        suggestions = None
+        if verdict == TOKEN_MISSPELLED and suggest:
+            # Get up to 3 word suggestions for misspelt word
+            if self.suggester is None:
+                self._build_suggester()
+            with self.profiler.stage(STAGE_SUGGEST):
+                if self.corpus_stats:
+                    # Rank more candidates by their frequency in the text
+                    suggestions = self.suggester.suggest(w.lower(), 10)
+                    suggestions = tuple(self.corpus_stats.rank(w.lower(), suggestions)[:3])
+                else:
+                    suggestions = tuple(self.suggester.suggest(w.lower(), 3))
 
-        if 300 >= r.status_code < 200:
-            tqdm.write(
-                f'WARN: Request returned status code: {r.status_code}. Your IP address may be blocked by google.')
-            return
+        self.token_cache[w] = (verdict, suggestions)
+        return verdict, suggestions
 
-        main_content = soup.find('div', id='main')
-        if not main_content:
-            tqdm.write(
-                f'WARN: No content found on google search. You may have hit a spam block/captcha.')
-            return
+    def _check_token(self, w):
+        ''' Returns the verdict for a stripped token without using the token cache '''
+        # Ignore words with numbers, tickers and names
+        if get_skip_reason(w):
+            return TOKEN_SKIPPED
 
-        for a_tag in main_content.find_all('a', href=re.compile('/search')):
-            if ('Did you mean' in a_tag.parent.text or
-                    'Showing results for' in a_tag.parent.text):
-                suggested_words = [b.text for b in a_tag.find_all('b')]
-                return suggested_words
-        return
+        word = w.lower()
+
+        # Check dictionaries
+        with self.profiler.stage(STAGE_LOOKUP):
+            source = self.lexicon.lookup(word)
+        if source:
+            self.count[f'lexicon-{source}'] += 1
+            return TOKEN_KNOWN
+
+        self.count['lexicon-unknown'] += 1
+        return TOKEN_MISSPELLED
+
+    def _spacy_spellcheck_batch(self, candidates, batch_size=32):
+        '''
+        Returns a list of booleans, True for each (word, text) candidate whose
+        word passes Spacy spellcheck. Results are cached by text hash and word
+        so repeated candidates are not run through the pipeline again.
+        '''
+        keys = [(text_hash(text), word) for word, text in candidates]
+
+        # Verdicts are returned from this dict rather than the bounded cache,
+        # which may evict them before the batch is finished
+        verdicts = {}
+        store = self.correction_store
+        to_check = {}
+        for key, (word, text) in zip(keys, candidates):
+            if key in verdicts or key in to_check:
+                continue
+            cached = self.spacy_cache.get(key)
+            if cached is not None:
+                self.count['spacy-cache-hits'] += 1
+                verdicts[key] = cached
+                continue
+            # Check for verdicts stored in previous runs
+            stored = store.get(KIND_SPACY, '|'.join(key)) if store else None
+            if stored is not None:
+                self.count['spacy-store-hits'] += 1
+                verdicts[key] = self.spacy_cache[key] = stored
+                continue
+            self.count['spacy-cache-misses'] += 1
+            to_check[key] = text
+
+        # Run uncached candidates through the pipeline in batches
+        if to_check:
+            with self.profiler.stage(STAGE_SPACY, calls=len(to_check)):
+                docs = self.nlp.pipe(to_check.values(), batch_size=batch_size)
+                for key, doc in zip(to_check, docs):
+                    verdicts[key] = self.spacy_cache[key] = self._spacy_doc_passes(key[1], doc)
+                    if store:
+                        store.set(KIND_SPACY, '|'.join(key), verdicts[key])
+
+        return [verdicts[key] for key in keys]
+
+    def _spacy_doc_passes(self, word, doc):
+        ''' Returns True if word is not flagged as misspelt in the spacy doc '''
+        # check if corrected word is still marked as mistake
+        if doc._.performed_spellCheck:
+            misspelt_spacy = [w.text for w,
+                              s in doc._.score_spellCheck.items()]
+            if word in misspelt_spacy:
+                return False
+        return True
+
+    def _get_f_new_context(self, context, old_word, new_word, context_start=None):
+        # Slice the word out of the context directly if its position is known
+        if context_start is not None and context[context_start:context_start+len(old_word)] == old_word:
+            return (context[:context_start] + f'{strikethrough(old_word)} \033[1m{new_word}\033[0m'
+                    + context[context_start+len(old_word):])
 
-    def _get_f_new_context(self, context, old_word, new_word):
         c_words = []
         for c_word in context.split():
             word_match = re.match(r'[^0-9a-zA-Z]*(.+?)[^0-9a-zA-Z]*$', c_word)
@@ -325,112 +1213,72 @@ class SpellChecker:
             c_words.append(c_word)
         return ' '.join(c_words)
 
-    def _load_word_dict(self):
+    def reload_dictionary(self):
         '''
-        Load custom word dictionary from file
-
+        Reloads the word dictionary file and rebuilds the lexicon and suggester, forgetting
+        cached token verdicts which may have changed. Spacy results are kept as they do not
+        depend on the dictionary.
         '''
-        workbook = load_workbook(self.word_dict_file)
-        worksheet = workbook.worksheets[0]
-
-        for cell in worksheet['A']:
-            # Split words/phrases in the same cell which are seperated by pipes '|'
-            cell_value = str(cell.value)
-            words = cell_value.split('|')
+        rebuild_suggester = self.suggester is not None
+        self.token_cache.clear()
+        self._load_word_dict()
+        if rebuild_suggester:
+            self._build_suggester()
 
-            for w in words:
-                word = w.strip().lower()
-                self.word_dict[word] = True
-
-    def _output_spacy(self):
-        workbook = Workbook()
-        # Non-corrected words output
-        not_corrected_ws = workbook.create_sheet('Not Corrected', 0)
-        not_corrected_ws['A1'] = 'User Action'
-        not_corrected_ws['A1'].font = Font(bold=True)
-        not_corrected_ws.column_dimensions['A'].alignment = Alignment(
-            horizontal='center')
-        not_corrected_ws['B1'] = 'Word'
-        not_corrected_ws['B1'].font = Font(bold=True)
-        not_corrected_ws['C1'] = 'Row'
-        not_corrected_ws['C1'].font = Font(bold=True)
-        not_corrected_ws['D1'] = 'Original Context'
-        not_corrected_ws['D1'].font = Font(bold=True)
-        not_corrected_ws['E1'] = 'Suggestions'
-        not_corrected_ws['E1'].font = Font(bold=True)
-        # Set column widths
-        not_corrected_ws.column_dimensions['A'].width = 20
-        not_corrected_ws.column_dimensions['B'].width = 25
-        not_corrected_ws.column_dimensions['C'].width = 5
-        not_corrected_ws.column_dimensions['D'].width = 100
-        not_corrected_ws.column_dimensions['E'].width = 20
-        not_corrected_ws.column_dimensions['F'].width = 20
-        not_corrected_ws.column_dimensions['G'].width = 20
-
-        for i, result in enumerate(self.not_corrected_words, start=1):
-            not_corrected_ws.cell(i+1, 2).value = result['word']
-            not_corrected_ws.cell(i+1, 2).hyperlink = result['search_word_url']
-            not_corrected_ws.cell(i+1, 2).style = 'Hyperlink'
-
-            not_corrected_ws.cell(i+1, 3).value = result['row']
-
-            not_corrected_ws.cell(i+1, 4).value = result['context']
-            not_corrected_ws.cell(
-                i+1, 4).hyperlink = result['search_context_url']
-            not_corrected_ws.cell(i+1, 4).style = 'Hyperlink'
-            try:
-                not_corrected_ws.cell(i+1, 5).value = result['suggestions'][0]
-                not_corrected_ws.cell(i+1, 6).value = result['suggestions'][1]
-                not_corrected_ws.cell(i+1, 7).value = result['suggestions'][2]
-            except IndexError:
-                pass
-
-        # Corrected words output
-        corrected_ws = workbook.create_sheet('Corrected', 1)
-        corrected_ws['A1'] = 'User Action'
-        corrected_ws['A1'].font = Font(bold=True)
-        corrected_ws.column_dimensions['A'].alignment = Alignment(
-            horizontal='center')
-        corrected_ws['B1'] = 'Word'
-        corrected_ws['B1'].font = Font(bold=True)
-        corrected_ws['C1'] = 'Correction'
-        corrected_ws['C1'].font = Font(bold=True)
-        corrected_ws['D1'] = 'Row'
-        corrected_ws['D1'].font = Font(bold=True)
-        corrected_ws['E1'] = 'Original Context'
-        corrected_ws['E1'].font = Font(bold=True)
-        corrected_ws['F1'] = 'Suggestions'
-        corrected_ws['F1'].font = Font(bold=True)
-        # Set column widths
-        corrected_ws.column_dimensions['A'].width = 20
-        corrected_ws.column_dimensions['B'].width = 25
-        corrected_ws.column_dimensions['C'].width = 25
-        corrected_ws.column_dimensions['D'].width = 5
-        corrected_ws.column_dimensions['E'].width = 100
-        corrected_ws.column_dimensions['F'].width = 20
-        corrected_ws.column_dimensions['G'].width = 20
-        corrected_ws.column_dimensions['H'].width = 20
-
-        # start=2 to skip header row
-        for i, result in enumerate(self.corrected_words, start=2):
-            corrected_ws.cell(i, 2).value = result['word']
-            corrected_ws.cell(i, 2).hyperlink = result['search_word_url']
-            corrected_ws.cell(i, 2).style = 'Hyperlink'
-
-            corrected_ws.cell(i, 3).value = result['correction']
-            corrected_ws.cell(i, 4).value = result['row']
-
-            corrected_ws.cell(i, 5).value = result['context']
-            corrected_ws.cell(i, 5).hyperlink = result['search_context_url']
-            corrected_ws.cell(i, 5).style = 'Hyperlink'
-            try:
-                corrected_ws.cell(i, 6).value = result['suggestions'][0]
-                corrected_ws.cell(i, 7).value = result['suggestions'][1]
-                corrected_ws.cell(i, 8).value = result['suggestions'][2]
-            except IndexError:
-                pass
-
-        workbook.save(self.result_file)
+    def _load_word_dict(self):
+        '''
+        Load custom word dictionary from the compiled dictionary file,
+        or from the dictionary file if it has changed since it was compiled
+        '''
+        words = read_compiled_dictionary(self.word_dict_compiled_file, self.word_dict_file)
+        if words is None:
+            tqdm.write('Compiling dictionary...')
+            words = self._read_word_dict_file()
+            write_compiled_dictionary(self.word_dict_compiled_file, self.word_dict_file, words)
+
+        self.word_dict = dict.fromkeys(words, True)
+        self._build_lexicon()
+
+    def _read_word_dict_file(self):
+        ''' Returns the set of words in the dictionary file '''
+        words = set()
+        workbook = load_workbook(self.word_dict_file, read_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(max_col=1, values_only=True):
+                # Skip empty cells
+                if not row or row[0] is None:
+                    continue
+                # Split words/phrases in the same cell which are seperated by pipes '|'
+                for w in str(row[0]).split('|'):
+                    word = w.strip().lower()
+                    # Words with line breaks can never match a token
+                    if word and '\n' not in word:
+                        words.add(word)
+        finally:
+            workbook.close()
+        return words
+
+    def _build_lexicon(self):
+        ''' Builds the lexicon index from the custom word dictionary and the english word lists '''
+        self.lexicon = Lexicon(self.word_dict,
+                               [('enchant_US', self.enchant_dict_US),
+                                ('enchant_GB', self.enchant_dict_GB)],
+                               profiler=self.profiler)
+        # The suggester indexes the lexicon's words, so is rebuilt on first use
+        self.suggester = None
+
+    def _build_suggester(self):
+        ''' Builds the suggester for the suggestion engine '''
+        fallback = EnchantSuggester(self.enchant_dict_US)
+        if self.suggestion_engine == ENGINE_ENCHANT:
+            self.suggester = fallback
+        elif self.suggestion_engine == ENGINE_SYMSPELL:
+            tqdm.write('Building SymSpell index...')
+            with self.profiler.stage(STAGE_BUILD_SUGGESTER):
+                self.suggester = SymSpellSuggester(self.lexicon.words, preferred_words=self.word_dict,
+                                                   fallback=fallback)
+        else:
+            raise ValueError(f'Unknown suggestion engine: {self.suggestion_engine!r}')
 
     def _output_debug(self):
         wb = Workbook()
@@ -444,155 +1292,63 @@ class SpellChecker:
     def apply_user_actions(self):
         ''' Process user actions in result.xlsx file '''
         tqdm.write('Applying word corrections and custom user actions to text...')
-        result_wb = load_workbook(self.result_file)
-        not_corrected_ws = result_wb['Not Corrected']
-        corrected_ws = result_wb['Corrected']
 
         words_to_add = set()  # Set of words to add to dictionary file
-        words_to_change = []  # List of dicts containing old word, new word, sentence line number
-        words_to_delete = []  # List of dicts containing word to delete, sentence line number
-        # Iterate result rows
-        for i in range(2, not_corrected_ws.max_row):  # Skip title row
-            user_input = not_corrected_ws.cell(i, 1).value
-            misspelled_word = not_corrected_ws.cell(i, 2).value
-            text_row = not_corrected_ws.cell(i, 3).value
-            # context = not_corrected_ws.cell(i, 4).value
-            suggestions = []
-            for j in range(5, not_corrected_ws.max_column+1):
-                _s = not_corrected_ws.cell(i, j).value
-                if _s:
-                    suggestions.append(_s)
-                # if (s := not_corrected_ws.cell(i, j).value):
-                #     suggestions.append(s)
-            # Ignore empty user actions on not corrected worksheet
-            if not user_input:
-                continue
-            # Change word in text to user selected suggestion
-            try:
-                fixed_word = suggestions[int(user_input)]
-                words_to_change.append(
-                    {'line': text_row, 'old_word': misspelled_word, 'new_word': fixed_word})
-                continue
-            except ValueError:
-                pass
-            except IndexError:
-                tqdm.write(
-                    f'WARN: word suggestion index ({user_input}) out of suggestion bounds on "{self.result_file} line {i}"')
-
-            # Add word to dictionary
-            if (user_input.lower() == 'a' or
-                    user_input.lower() == 'add'):
-                if misspelled_word not in words_to_add:
-                    words_to_add.add(misspelled_word)
-                continue
-
-            # Delete word
-            if (user_input.lower() == 'd' or
-                    user_input.lower() == 'del'):
-                words_to_delete.append(
-                    {'line': text_row, 'word': misspelled_word})
-                continue
-
-            # Change word
-            words_to_change.append(
-                {'line': text_row, 'old_word': misspelled_word, 'new_word': user_input})
-
-        for i in range(2, corrected_ws.max_row):  # Skip title row
-            user_input = corrected_ws.cell(i, 1).value
-            misspelled_word = corrected_ws.cell(i, 2).value
-            corrected_word = corrected_ws.cell(i, 3).value
-            text_row = corrected_ws.cell(i, 4).value
-            suggestions = []
-            for j in range(6, corrected_ws.max_column+1):
-                _s = corrected_ws.cell(i, j).value
-                if _s:
-                    suggestions.append(_s)
-                # if (s := corrected_ws.cell(i, j).value):
-                #     suggestions.append(s)
-            # On corrected worksheet, if user action is empty then apply corrected word to text output
-            if not user_input:
-                words_to_change.append(
-                    {'line': text_row, 'old_word': misspelled_word, 'new_word': corrected_word})
-                continue
-
-            # Change word in text to user selected suggestion
-            try:
-                fixed_word = suggestions[int(user_input)]
-                words_to_change.append(
-                    {'line': text_row, 'old_word': misspelled_word, 'new_word': fixed_word})
-                continue
-            except ValueError:
-                pass
-            except IndexError:
-                tqdm.write(
-                    f'WARN: word suggestion index ({user_input}) out of suggestion bounds on "{self.result_file} line {i}"')
-
-            # Add word to dictionary
-            if (user_input.lower() == 'a' or
-                    user_input.lower() == 'add'):
-                if misspelled_word not in words_to_add:
-                    words_to_add.add(misspelled_word)
-                continue
-
-            # Delete word
-            if (user_input.lower() == 'd' or
-                    user_input.lower() == 'del'):
-                words_to_delete.append(
-                    {'line': text_row, 'word': misspelled_word})
-                continue
-
-            # Change word
-            words_to_change.append(
-                {'line': text_row, 'old_word': misspelled_word, 'new_word': user_input})
-
-        # Apply word changes to text file and output to a new file
-        text_output_wb = load_workbook(self.input_file)
-        # Replace misspelled words with correct words in input text file
-        text_output_ws = text_output_wb.worksheets[0]
-        col = self._get_column_with_title(text_output_ws, 'text')
-        col = col if col else 1
-
-        # Change/correct words in text file
-        for change in words_to_change:
-            cell = text_output_ws.cell(change['line'], col)
-
-            regex = fr'[^0-9a-zA-Z]+({change["old_word"]})[^0-9a-zA-Z]+'
-            pattern = re.compile(regex)
-            cell.value = ' ' + cell.value + ' '
-            word_match = pattern.search(cell.value)
-            if not word_match:
-                continue
-
-            to_replace = word_match.group(0)
-            word_group = word_match.group(1)
-            replace_with = to_replace.replace(word_group, change['new_word'])
-            cell.value = str(cell.value).replace(
-                to_replace, replace_with).strip()
-            self.count['user-words-corrected'] += 1
+        # Text row number to list of edit dicts containing the word, the new word
+        # (None to delete the word) and the index of the word's token if known
+        edits_by_line = defaultdict(list)
+
+        # Stream result rows. On the corrected worksheet an empty user action applies the correction
+        result_wb = load_workbook(self.result_file, read_only=True)
+        try:
+            sheets = [(result_wb['Not Corrected'], NOT_CORRECTED_COLUMNS),
+                      (result_wb['Corrected'], CORRECTED_COLUMNS)]
+            for worksheet, columns in sheets:
+                for i, values in enumerate(worksheet.iter_rows(min_row=2, values_only=True), start=2):
+                    finding = dict(zip(columns, values))
+                    if not finding.get('word') or not finding.get('row'):
+                        continue
+                    suggestions = [finding[c] for c in SUGGESTION_COLUMNS if finding.get(c)]
+                    action = self._parse_user_action(
+                        finding.get('user_action'), suggestions, finding.get('correction'), f'{worksheet.title} line {i}')
+                    if action is None:
+                        continue
+                    if action == USER_ACTION_ADD:
+                        words_to_add.add(finding['word'])
+                        continue
+                    edits_by_line[int(finding['row'])].append({'word': finding['word'],
+                                                               'new_word': action,
+                                                               'index': finding.get('index')})
+        finally:
+            result_wb.close()
 
         # Add words to dictionary
+        compiled_words = read_compiled_dictionary(self.word_dict_compiled_file, self.word_dict_file)
         dict_workbook = load_workbook(self.word_dict_file)
         dict_worksheet = dict_workbook.worksheets[0]
         for word in words_to_add:
             dict_worksheet.append([word])
             self.count['user-words-added-to-dictionary'] += 1
         dict_workbook.save(self.word_dict_file)
-
-        # Delete words
-        for word in words_to_delete:
-            cell = text_output_ws.cell(word['line'], col)
-
-            regex = fr'[^0-9a-zA-Z]+({word["word"]})[^0-9a-zA-Z]+'
-            pattern = re.compile(regex)
-            cell.value = ' ' + cell.value + ' '
-            word_match = pattern.search(cell.value)
-            if not word_match:
-                continue
-
-            to_replace = word_match.group(0)
-            word_group = word_match.group(1)
-            cell.value = str(cell.value).replace(to_replace, '').strip()
-            self.count['user-words-deleted'] += 1
+        # Add the words to the compiled dictionary rather than recompiling it on the next run
+        if compiled_words is not None:
+            compiled_words = set(compiled_words)
+            compiled_words.update(w.strip().lower() for w in words_to_add)
+            write_compiled_dictionary(self.word_dict_compiled_file, self.word_dict_file, compiled_words)
+
+        # Stream the input text file into a new output file, applying word changes
+        text_output_wb = Workbook(write_only=True)
+        text_output_ws = text_output_wb.create_sheet()
+        col = None
+        for row_num, values in iter_rows(self.input_file):
+            values = list(values)
+            if col is None:
+                col = get_text_column_index(values)
+                col = col if col is not None else 0
+            edits = edits_by_line.get(row_num)
+            if edits and col < len(values) and values[col]:
+                values[col] = self._apply_text_edits(str(values[col]), edits)
+            text_output_ws.append(values)
 
         # Save output text to file
         text_output_wb.save(self.text_output_file)
@@ -604,9 +1360,261 @@ class SpellChecker:
         print(f'\nUser deleted {self.count["user-words-deleted"]} words.')
         return
 
+    def _parse_user_action(self, user_input, suggestions, correction=None, location=''):
+        '''
+        Returns the new word for a result row's user action, USER_ACTION_DELETE to delete the word,
+        USER_ACTION_ADD to add the word to the dictionary, or None to leave the word unchanged.
+        An empty user action applies the correction, if any.
+        '''
+        if user_input is None or str(user_input).strip() == '':
+            return correction
+        user_input = str(user_input).strip()
+
+        # Change word in text to user selected suggestion number
+        if user_input.isdigit():
+            suggestion_idx = int(user_input) - 1
+            if 0 <= suggestion_idx < len(suggestions):
+                return suggestions[suggestion_idx]
+            tqdm.write(
+                f'WARN: word suggestion index ({user_input}) out of suggestion bounds on "{self.result_file} {location}"')
+
+        # Add word to dictionary
+        if user_input.lower() in ('a', 'add'):
+            return USER_ACTION_ADD
+
+        # Delete word
+        if user_input.lower() in ('d', 'del'):
+            return USER_ACTION_DELETE
+
+        # Change word
+        return user_input
+
+    def _apply_text_edits(self, text, edits):
+        '''
+        Returns the text with the word changes and deletions applied in a single pass over its tokens.
+        Edits with a token index apply to that token, other edits apply to the next token with the word.
+        '''
+        parts = re.split(r'(\s+)', text)  # Tokens at even indexes, whitespace at odd indexes
+        tokens = parts[::2] if parts[0] else parts[2::2]
+        first_token_part = 0 if parts[0] else 2
+
+        # Find the token each edit applies to
+        token_edits = {}
+        unindexed = defaultdict(list)
+        for edit in edits:
+            index = edit['index']
+            if index is not None and 0 <= index < len(tokens) and \
+                    normalize_token(tokens[index])[0] == edit['word'] and index not in token_edits:
+                token_edits[index] = edit
+            else:
+                unindexed[edit['word']].append(edit)
+        if unindexed:
+            for index, raw in enumerate(tokens):
+                if index in token_edits:
+                    continue
+                word_edits = unindexed.get(normalize_token(raw)[0])
+                if word_edits:
+                    token_edits[index] = word_edits.pop(0)
+
+        for index, edit in sorted(token_edits.items()):
+            part_idx = first_token_part + 2 * index
+            raw = parts[part_idx]
+            start, end = get_token_word_span(raw)
+            if edit['new_word'] is USER_ACTION_DELETE:
+                opening, closing = raw[:start], raw[end:]
+                # A bracketed word leaves an empty pair of brackets, which is deleted with it
+                if opening and closing[:1] in (')', ']', '}'):
+                    opening, closing = '', closing[1:]
+                # Trailing punctuation is joined to the previous token and an unclosed bracket to
+                # the next token, by removing the whitespace between them, else they are deleted too
+                parts[part_idx] = ''
+                if closing and ''.join(parts[:part_idx]).strip():
+                    parts[part_idx - 1] = ''
+                    parts[part_idx] = closing
+                if opening and ''.join(parts[part_idx + 1:]).strip():
+                    parts[part_idx + 1] = ''
+                    parts[part_idx] += opening
+                # Remove the whitespace after the deleted token, or before it if it is the last token
+                if not parts[part_idx]:
+                    if part_idx + 1 < len(parts) and parts[part_idx + 2:] != ['']:
+                        parts[part_idx + 1] = ''
+                    elif part_idx > 0:
+                        parts[part_idx - 1] = ''
+                self.count['user-words-deleted'] += 1
+            else:
+                parts[part_idx] = raw[:start] + edit['new_word'] + raw[end:]
+                self.count['user-words-corrected'] += 1
+
+        return ''.join(parts)
+
+
+class ResultWriter:
+    '''
+    Streams corrected and not corrected words into the 'Not Corrected' and 'Corrected'
+    worksheets of a write-only result workbook, so results are not held in memory
+    '''
+
+    def __init__(self, result_file, search_url='http://www.google.com/search?q='):
+        self.result_file = result_file
+        # Search urls for the word and context hyperlinks are built as each row is written
+        self.search_url = search_url
+        self.workbook = Workbook(write_only=True)
+
+        # Non-corrected words output
+        self.not_corrected_ws = self.workbook.create_sheet('Not Corrected')
+        self._write_header(self.not_corrected_ws,
+                           ['User Action', 'Word', 'Row', 'Original Context', 'Suggestions', None, None],
+                           [20, 25, 5, 100, 20, 20, 20])
+
+        # Corrected words output
+        self.corrected_ws = self.workbook.create_sheet('Corrected')
+        self._write_header(self.corrected_ws,
+                           ['User Action', 'Word', 'Correction', 'Row', 'Original Context', 'Suggestions', None, None],
+                           [20, 25, 25, 5, 100, 20, 20, 20])
+
+    def _write_header(self, worksheet, titles, widths):
+        # Column dimensions must be set before any rows are written
+        worksheet.column_dimensions['A'].alignment = Alignment(horizontal='center')
+        for j, width in enumerate(widths, start=1):
+            worksheet.column_dimensions[get_column_letter(j)].width = width
+        # Hide token index and character span columns, used when applying user actions
+        for j in range(len(titles)+1, len(titles)+len(SPAN_COLUMNS)+1):
+            worksheet.column_dimensions[get_column_letter(j)].hidden = True
+
+        header = []
+        for title in titles + ['Token Index', 'Start', 'End']:
+            cell = WriteOnlyCell(worksheet, value=title)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        worksheet.append(header)
+
+    def _suggestion_and_span_values(self, result):
+        suggestions = list(result.suggestions[:3])
+        suggestions += [None] * (len(SUGGESTION_COLUMNS) - len(suggestions))
+        return suggestions + [result.index, result.start, result.end]
+
+    def _hyperlink_cell(self, worksheet, value, url):
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.hyperlink = url
+        cell.style = 'Hyperlink'
+        return cell
+
+    def write_not_corrected(self, result):
+        ws = self.not_corrected_ws
+        ws.append([None,
+                   self._hyperlink_cell(ws, result.word, result.search_word_url(self.search_url)),
+                   result.row,
+                   self._hyperlink_cell(ws, result.context, result.search_context_url(self.search_url))]
+                  + self._suggestion_and_span_values(result))
+
+    def write_corrected(self, result):
+        ws = self.corrected_ws
+        ws.append([None,
+                   self._hyperlink_cell(ws, result.word, result.search_word_url(self.search_url)),
+                   result.correction,
+                   result.row,
+                   self._hyperlink_cell(ws, result.context, result.search_context_url(self.search_url))]
+                  + self._suggestion_and_span_values(result))
+
+    def save(self):
+        self.workbook.save(self.result_file)
+
+    def close(self):
+        ''' Discards the results of a run which did not finish, closing the worksheets' temporary files '''
+        for worksheet in (self.not_corrected_ws, self.corrected_ws):
+            if not worksheet.closed:
+                worksheet.close()
+
+
+### WORKER PROCESS FUNCTIONS ###
+
+# SpellChecker settings copied from the parent process to each worker process
+WORKER_SETTINGS = ['correction_store_file', 'suggestion_engine', 'single_suggestion_max_distance',
+                   'closest_suggestion_max_distance', 'search_url', 'google_rate', 'google_concurrency']
+
+# SpellChecker instance loaded once per worker process
+_worker_sc = None
+
+
+def _init_worker(init_kwargs, word_dict, settings, corpus_stats=None, profile=False):
+    '''
+    Loads the dictionaries and spacy pipeline for a worker process,
+    with the settings of the parent process's SpellChecker
+    '''
+    global _worker_sc
+    _worker_sc = SpellChecker(**init_kwargs)
+    for name, value in settings.items():
+        setattr(_worker_sc, name, value)
+    _worker_sc.profiler.enabled = profile
+    _worker_sc.word_dict = word_dict
+    _worker_sc.corpus_stats = corpus_stats
+    _worker_sc.google_misspellings = []
+    _worker_sc._build_lexicon()
+
+
+def _check_rows_worker(args):
+    ''' Spell checks a chunk of rows in a worker process and returns the results '''
+    rows, chunk_size, check_kwargs = args
+    sc = _worker_sc
+    _reset_worker_results(sc, check_kwargs['debug'])
+    sc._check_rows(rows, chunk_size, **check_kwargs)
+    return _get_worker_results(sc, check_kwargs['debug'], rows=len(rows), last_row=rows[-1][0])
+
+
+def _correct_misspellings_worker(args):
+    ''' Corrects a chunk of (text, misspelling) tuples in a worker process and returns the results '''
+    pending, correct_kwargs = args
+    sc = _worker_sc
+    _reset_worker_results(sc)
+    sc._correct_misspellings(pending, **correct_kwargs)
+    sc._commit_stores()
+    return _get_worker_results(sc)
+
+
+def _reset_worker_results(sc, debug=False):
+    ''' Resets the per-chunk results of a worker process, keeping caches warm between chunks '''
+    sc.corrected_words = []
+    sc.not_corrected_words = []
+    sc.google_misspellings = []
+    sc.count.clear()
+    sc.profiler.reset()
+    if debug:
+        sc.words = []
+
+
+def _get_worker_results(sc, debug=False, **results):
+    ''' Returns the results of a chunk checked in a worker process, with any extra results '''
+    return dict(results,
+                corrected_words=sc.corrected_words,
+                not_corrected_words=sc.not_corrected_words,
+                google_misspellings=sc.google_misspellings,
+                count=dict(sc.count),
+                profile=sc.profiler.report()['stages'] if sc.profiler.enabled else None,
+                words=sc.words if debug else None)
+
 
 ### HELPER FUNCTIONS ###
 
+class LRUCache(OrderedDict):
+    ''' Dict with a bounded size which evicts the least recently used entries '''
+
+    def __init__(self, maxsize=100000):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
 def print_process_time(msg, func, *args, **kwargs):
     ''' Prints time taken to run a function '''
     start_time = time.time()
@@ -616,6 +1624,84 @@ def print_process_time(msg, func, *args, **kwargs):
     return ret
 
 
+def iter_rows(path):
+    '''
+    Yields (row number, row values) for each row in the first worksheet of an Excel file,
+    each row of a .csv file or each line of a .txt file, without loading the whole file
+    '''
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            for i, row in enumerate(csv.reader(f), start=1):
+                yield i, tuple(row)
+    elif ext == '.txt':
+        with open(path, encoding='utf-8') as f:
+            for i, line in enumerate(f, start=1):
+                yield i, (line.rstrip('\r\n'),)
+    else:
+        workbook = load_workbook(path, read_only=True)
+        try:
+            for i, row in enumerate(workbook.worksheets[0].iter_rows(values_only=True), start=1):
+                yield i, row
+        finally:
+            workbook.close()
+
+
+def get_text_column_index(header_row, text='text'):
+    ''' Returns the 0-based index of the column in the header row titled text, else None '''
+    for j, value in enumerate(header_row):
+        if str(value).strip().lower() == text.strip().lower():
+            return j
+    return None
+
+
+def iter_text_rows(path):
+    '''
+    Yields (row number, text) for each row in the column titled 'Text' of the input file,
+    or for each row in the first column if no column has the title
+    '''
+    rows = iter_rows(path)
+    first_row = next(rows, None)
+    if first_row is None:
+        return
+
+    # Find column with 'text' as title cell
+    tqdm.write('Finding "Text" column...')
+    col = get_text_column_index(first_row[1])
+    if col is None:
+        col = 0
+        rows = itertools.chain([first_row], rows)
+        tqdm.write(f'No column with title "text", defaulting to column {get_column_letter(col+1)}')
+    else:
+        # Ignore title row
+        tqdm.write(f'Column {get_column_letter(col+1)} has title "text"')
+
+    for row_num, values in rows:
+        yield row_num, values[col] if col < len(values) else None
+
+
+def chunked(iterable, size):
+    ''' Yields lists of up to size items from the iterable '''
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def correction_key(misspelling):
+    ''' Returns the correction store key for a misspelling, from its word and context '''
+    return misspelling.word.lower() + '|' + text_hash(misspelling.context)
+
+
+def text_hash(text):
+    ''' Returns a stable hash of the text for use as a cache key '''
+    return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+
 def strikethrough(text):
     s = ''
     for c in text:
@@ -641,6 +1727,7 @@ if __name__ == "__main__":
     
     sc_kwargs = {}
     sct_kwargs = {}
+    no_cache = False
     for arg in sys.argv[1:]:
         if arg == '--no-auto':
             sct_kwargs['auto'] = False
@@ -650,8 +1737,34 @@ if __name__ == "__main__":
             sct_kwargs['suggest'] = False
         if arg == '--no-google':
             sct_kwargs['google_sc'] = False
-            if arg == '--no-spacy':
-                sc_kwargs['_spacy'] = False
-            
+        if arg == '--no-spacy':
+            sc_kwargs['_spacy'] = False
+        if arg == '--incremental':
+            sct_kwargs['incremental'] = True
+        if arg == '--no-dedupe':
+            sct_kwargs['dedupe'] = False
+        if arg == '--no-cache':
+            no_cache = True
+        if arg.startswith('--workers='):
+            sct_kwargs['workers'] = int(arg.split('=', 1)[1])
+        if arg.startswith('--suggestions='):
+            sct_kwargs['suggestion_engine'] = arg.split('=', 1)[1]
+        if arg == '--corpus-stats':
+            sct_kwargs['corpus_stats'] = True
+        if arg == '--no-cascade':
+            sct_kwargs['cascade'] = False
+        if arg == '--profile':
+            sct_kwargs['profile'] = True
+        if arg == '--pipeline':
+            sct_kwargs['pipeline'] = True
+        if arg.startswith('--queue-size='):
+            sct_kwargs['queue_size'] = int(arg.split('=', 1)[1])
+        if arg.startswith('--correct-workers='):
+            sct_kwargs['correct_workers'] = int(arg.split('=', 1)[1])
+        if arg == '--resume':
+            sct_kwargs['resume'] = True
+
     sc = SpellChecker(**sc_kwargs)
+    if no_cache:
+        sc.correction_store_file = None
     sc.spell_check_text(**sct_kwargs)
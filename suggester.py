@@ -0,0 +1,131 @@
+# Suggestion engines which can be selected with SpellChecker.spell_check_text
+ENGINE_ENCHANT = 'enchant'
+ENGINE_SYMSPELL = 'symspell'
+
+
+class EnchantSuggester:
+    ''' Suggests corrections for a misspelt word using an enchant dictionary '''
+
+    def __init__(self, enchant_dict):
+        self.enchant_dict = enchant_dict
+
+    def suggest(self, word, max_suggestions=3):
+        ''' Returns a list of up to max_suggestions corrections for the lowercase word, best first '''
+        return self.enchant_dict.suggest(word)[:max_suggestions]
+
+
+class SymSpellSuggester:
+    '''
+    Suggests corrections for a misspelt word using a SymSpell index of precomputed deletes.
+    Every word in the lexicon is indexed under each string made by deleting up to
+    max_edit_distance characters from its first prefix_length characters, so lookups only
+    generate the deletes of the misspelt word rather than every possible edit of it.
+    Candidates are ranked by edit distance, preferring custom dictionary words.
+    Misspellings with no candidates are passed to the fallback suggester, if any.
+    '''
+
+    def __init__(self, words, max_edit_distance=2, prefix_length=7, preferred_words=(), fallback=None):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.preferred_words = set(preferred_words)
+        self.fallback = fallback
+
+        # Map each delete to the word, or tuple of words, it was made from.
+        # Most deletes come from a single word, so they are not wrapped in a tuple
+        self.deletes = {}
+        for word in words:
+            # Tokens never contain whitespace, so phrases can never be suggested
+            if not word or ' ' in word:
+                continue
+            for delete in self._get_deletes(word[:prefix_length]):
+                indexed = self.deletes.get(delete)
+                if indexed is None:
+                    self.deletes[delete] = word
+                elif isinstance(indexed, tuple):
+                    self.deletes[delete] = indexed + (word,)
+                elif indexed != word:
+                    self.deletes[delete] = (indexed, word)
+
+    def __len__(self):
+        return len(self.deletes)
+
+    def _get_deletes(self, key):
+        ''' Returns the set of strings made by deleting up to max_edit_distance characters from key '''
+        deletes = edits = {key}
+        for _ in range(self.max_edit_distance):
+            # Words are never deleted down to an empty string
+            edits = {edit[:i] + edit[i+1:] for edit in edits if len(edit) > 1 for i in range(len(edit))}
+            deletes = deletes | edits
+        return deletes
+
+    def suggest(self, word, max_suggestions=3):
+        ''' Returns a list of up to max_suggestions corrections for the lowercase word, best first '''
+        candidates = set()
+        for delete in self._get_deletes(word[:self.prefix_length]):
+            indexed = self.deletes.get(delete)
+            if indexed is None:
+                continue
+            if isinstance(indexed, tuple):
+                candidates.update(indexed)
+            else:
+                candidates.add(indexed)
+        candidates.discard(word)
+
+        ranked = []
+        for candidate in candidates:
+            if abs(len(candidate) - len(word)) > self.max_edit_distance:
+                continue
+            distance = edit_distance(word, candidate, self.max_edit_distance)
+            if distance is not None:
+                ranked.append((distance, candidate not in self.preferred_words, candidate))
+        if not ranked and self.fallback:
+            return self.fallback.suggest(word, max_suggestions)
+        return [candidate for *key, candidate in sorted(ranked)[:max_suggestions]]
+
+
+def edit_distance(a, b, max_distance=None):
+    '''
+    Returns the Damerau-Levenshtein (optimal string alignment) distance between two strings,
+    or None if it is greater than max_distance
+    '''
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return None
+
+    # Common prefixes and suffixes do not change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1-end] == b[-1-end]:
+        end += 1
+    a = a[start:len(a)-end]
+    b = b[start:len(b)-end]
+    if not a or not b:
+        distance = len(a) or len(b)
+        return None if max_distance is not None and distance > max_distance else distance
+
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        a_char = a[i-1]
+        for j in range(1, len(b) + 1):
+            distance = prev[j-1] if a_char == b[j-1] else prev[j-1] + 1
+            if prev[j] + 1 < distance:
+                distance = prev[j] + 1
+            if current[j-1] + 1 < distance:
+                distance = current[j-1] + 1
+            # Transposition of two adjacent characters
+            if i > 1 and j > 1 and a_char == b[j-2] and a[i-2] == b[j-1] and prev_prev[j-2] + 1 < distance:
+                distance = prev_prev[j-2] + 1
+            current[j] = distance
+        if max_distance is not None and min(current) > max_distance:
+            return None
+        prev_prev, prev = prev, current
+
+    distance = prev[len(b)]
+    if max_distance is not None and distance > max_distance:
+        return None
+    return distance
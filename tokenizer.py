@@ -0,0 +1,62 @@
+import re
+from functools import lru_cache
+
+# Reasons a token is skipped instead of spell checked
+SKIP_PUNCTUATION = 'punctuation'  # Token is only punctuation/brackets
+SKIP_NUMBER = 'number'  # Token contains numbers
+SKIP_TICKER = 'ticker'  # Short, all caps token (Likely tickers)
+SKIP_NAME = 'name'  # Capitalized token (Names)
+
+# Matches a whitespace seperated token, capturing the token with one opening
+# bracket, one closing bracket and one trailing punctuation character stripped,
+# e.g. '(dividends),' -> 'dividends'
+TOKEN_RE = re.compile(r'[(\[{]?(.*?)([)\]}]?)[,.;:/\-!?%]?$', re.DOTALL)
+NUMBER_RE = re.compile(r'[0-9]')
+WHITESPACE_TOKEN_RE = re.compile(r'\S+')
+
+
+def tokenize(text):
+    '''
+    Returns a list of (index, raw, word, skip) tuples for each whitespace seperated token in
+    the text, where index is the position of the token in text.split(), raw is the token as
+    it appears in the text, word is the token stripped of punctuation and brackets, and
+    skip is the reason the word should not be spell checked, else None
+    '''
+    return [(i, raw) + normalize_token(raw) for i, raw in enumerate(text.split())]
+
+
+@lru_cache(maxsize=65536)
+def normalize_token(raw):
+    '''
+    Returns a (word, skip) tuple for a raw token. Results are cached as
+    the same tokens are repeated many times throughout the text.
+    '''
+    match = TOKEN_RE.match(raw)
+    word = match.group(1)
+    if not word and not match.group(2):
+        return word, SKIP_PUNCTUATION
+    return word, get_skip_reason(word)
+
+
+def get_token_spans(text):
+    ''' Returns a list of the (start, end) character spans of each whitespace seperated token in the text '''
+    return [match.span() for match in WHITESPACE_TOKEN_RE.finditer(text)]
+
+
+def get_token_word_span(raw):
+    ''' Returns the (start, end) span of the word within a raw token '''
+    return TOKEN_RE.match(raw).span(1)
+
+
+def get_skip_reason(word):
+    ''' Returns the reason a stripped word should not be spell checked, else None '''
+    # Ignore words with numbers
+    if NUMBER_RE.search(word):
+        return SKIP_NUMBER
+    # Ignore short, all caps words (Likely tickers)
+    if len(word) <= 5 and word == word.upper():
+        return SKIP_TICKER
+    # Ignore capitalized words (Names)
+    if word == word.capitalize():
+        return SKIP_NAME
+    return None